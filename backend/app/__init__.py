@@ -1,8 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.database.connection import connect_to_mongo, close_mongo_connection
-from app.routes import auth_router, snippets_router, ai_router, websocket_router
+from app.database.indexes import ensure_indexes_on_startup
+from app.database.repositories.blob_repository import MissingBlobError
+from app.database.write_behind import chat_writer
+from app.routes import auth_router, snippets_router, ai_router, websocket_router, metrics_router
+from app.routes.websocket import manager as connection_manager
+from app.utils.openai_client import ai_client
+from app.utils.rate_limiter import rate_limiter
+from app.utils.auth import shutdown_password_executor
+from app.utils.tokens import load_tokenizer
+from app.utils.metrics import MetricsMiddleware
+from app.config import settings
 
 
 @asynccontextmanager
@@ -10,8 +21,21 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
     await connect_to_mongo()
+    if settings.DB_ENSURE_INDEXES:
+        await ensure_indexes_on_startup()
+    if settings.CHAT_WRITE_BEHIND_ENABLED:
+        chat_writer.start()
+    ai_client.start()
+    load_tokenizer()  # may fetch the vocabulary; keep that off the request path
+    rate_limiter.start_sweeper(settings.RATE_LIMIT_SWEEP_SECONDS)
+    await connection_manager.start()
     yield
     # Shutdown
+    await connection_manager.stop()
+    await rate_limiter.stop_sweeper()
+    await chat_writer.stop()
+    shutdown_password_executor()
+    await ai_client.close()
     await close_mongo_connection()
 
 
@@ -19,7 +43,8 @@ app = FastAPI(
     title="CodeMentor AI",
     description="Intelligent Coding Assistant with AI-powered code generation, debugging, and explanation",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -31,11 +56,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency by route, exposed on /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(snippets_router)
 app.include_router(ai_router)
 app.include_router(websocket_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
+
+
+@app.exception_handler(MissingBlobError)
+async def missing_blob_handler(request: Request, exc: MissingBlobError):
+    """Fail loudly instead of serving a snippet or chat whose stored code is gone"""
+    return ORJSONResponse(status_code=500, content={"detail": "Stored code for this item is missing"})
 
 
 @app.get("/")
@@ -51,4 +88,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    if connection_manager.draining:
+        # Lets the load balancer stop routing here while streams finish
+        return ORJSONResponse({"status": "draining"}, status_code=503)
     return {"status": "healthy"}
@@ -1,5 +1,4 @@
-import uvicorn
-from app import app
+from app.server import serve
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    serve()
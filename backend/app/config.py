@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Application settings loaded from environment variables / .env"""
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Server (python -m app)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 1  # worker processes; >1 requires the Mongo backends for shared state
+    SERVER_LOOP: str = "auto"  # "auto" picks uvloop when installed, else "asyncio"
+    SERVER_HTTP: str = "auto"  # "auto" picks httptools when installed, else "h11"
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # per worker; extra connections get a 503
+    SERVER_BACKLOG: int = 2048
+    SERVER_DRAIN_SECONDS: int = 30  # wait this long for AI streams to finish on shutdown
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 10  # then this long for open requests
+    WS_PING_INTERVAL_SECONDS: float = 20.0
+    WS_PING_TIMEOUT_SECONDS: float = 20.0
+    WS_MAX_MESSAGE_BYTES: int = 1024 * 1024
+    WS_PER_MESSAGE_DEFLATE: bool = True
+    PROXY_HEADERS: bool = True
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    # MongoDB
+    MONGODB_URL: str = "mongodb://localhost:27017"
+    DATABASE_NAME: str = "codementor_ai"
+    DB_ENSURE_INDEXES: bool = True  # create missing declared indexes at startup
+    MONGO_MAX_POOL_SIZE: int = 100  # per worker process
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_IDLE_TIME_MS: int = 300000
+    MONGO_MAX_CONNECTING: int = 4  # connections being opened at once
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2000  # fail instead of queueing forever on a saturated pool
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_COMPRESSORS: str = "zstd,zlib"  # in order of preference; "snappy" needs python-snappy
+    MONGO_ZLIB_COMPRESSION_LEVEL: int = 6
+    MONGO_WARM_CONNECTIONS: int = 10  # opened at startup so the first requests don't pay for handshakes
+    # Read preference, read concern and write concern per profile; repositories pick one by name
+    MONGO_PROFILES: Dict[str, dict] = {
+        "default": {},
+        "durable": {"w": "majority", "j": True, "wtimeout_ms": 5000},
+        "fast_write": {"w": 1},
+    }
+
+    # JWT
+    JWT_SECRET_KEY: str
+    JWT_ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Auth caches
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+
+    # OpenAI
+    OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint, e.g. the benchmark stand-in
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_MAX_CONCURRENCY: int = 32  # in-flight upstream requests across all modes
+    OPENAI_MODE_CONCURRENCY: int = 16  # in-flight upstream requests per mode
+    OPENAI_MAX_QUEUE: int = 64  # requests allowed to wait for a slot before shedding
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    AI_REQUEST_TIMEOUT_SECONDS: float = 60.0  # whole non-streaming request, fallbacks included
+    AI_ATTEMPT_TIMEOUT_SECONDS: float = 25.0  # one tier attempt, leaving time to fall back
+    AI_FIRST_TOKEN_TIMEOUT_SECONDS: float = 10.0  # streaming: first chunk per tier attempt
+    AI_STREAM_TIMEOUT_SECONDS: float = 120.0  # streaming: whole response
+    OPENAI_MAX_RETRIES: int = 0  # client-side retries; the model router falls back to another tier instead
+
+    # Model routing: tiers cheapest first, set as JSON in the environment
+    AI_BACKEND: str = "openai"  # "openai" or "stub" (offline, deterministic replies)
+    AI_MODEL_TIERS: List[dict] = [
+        {"name": "fast", "model": "gpt-3.5-turbo", "context_window": 4096,
+         "max_tokens": {"default": 1500, "explain": 1000, "summary": 400}},
+        {"name": "long", "model": "gpt-3.5-turbo-16k", "context_window": 16384,
+         "max_tokens": {"default": 2000, "summary": 400}},
+        {"name": "large", "model": "gpt-4-1106-preview", "context_window": 128000,
+         "max_tokens": {"default": 4000, "summary": 400}},
+    ]
+    AI_MODE_MIN_TIER: Dict[str, str] = {}  # e.g. {"debug": "long"} to skip cheaper tiers for a mode
+    AI_STUB_LATENCY_MS: int = 200
+    AI_STUB_FAILURES: Dict[str, str] = {}  # model -> "timeout", "rate_limit" or "error"
+
+    # Chat continuation
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 3000  # prompt tokens for a follow-up turn, summary and code included
+    CHAT_SUMMARY_TRIGGER_TOKENS: int = 1000  # unsummarized overflow that triggers a summary refresh
+    CHAT_MAX_STORED_MESSAGES: int = 200  # messages kept per chat document
+
+    # Chat history write-behind
+    CHAT_WRITE_BEHIND_ENABLED: bool = True  # batch chat inserts in the background
+    CHAT_WRITE_QUEUE_SIZE: int = 10000  # queued inserts before falling back to inline writes
+    CHAT_WRITE_BATCH_SIZE: int = 100
+    CHAT_WRITE_FLUSH_MS: int = 200
+    CHAT_WRITE_MAX_RETRIES: int = 5
+    CHAT_WRITE_RETRY_BASE_MS: int = 200  # doubled on every retry
+
+    # Rate limiting
+    RATE_LIMIT_REQUESTS: int = 50
+    RATE_LIMIT_WINDOW_MINUTES: int = 60
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "mongo" (shared by all workers)
+    RATE_LIMIT_SWEEP_SECONDS: int = 300
+
+    # WebSocket streaming
+    WS_BATCH_MAX_DELAY_MS: int = 30  # flush buffered chunks at least this often
+    WS_BATCH_MAX_CHARS: int = 1024  # flush early once this many characters are buffered
+    WS_SEND_QUEUE_SIZE: int = 256  # outbound messages buffered per connection
+    WS_SLOW_CONSUMER_POLICY: str = "disconnect"  # "disconnect", "drop_oldest" or "drop_newest"
+
+    # Team rooms
+    ROOM_BACKPLANE: str = "memory"  # "memory" (single process) or "mongo" (rooms span workers/hosts)
+    ROOM_EVENTS_CAPPED_BYTES: int = 16 * 1024 * 1024
+    ROOM_PRESENCE_TTL_SECONDS: int = 60
+
+    # Snippet search
+    SNIPPET_NGRAM_INDEX_ENABLED: bool = True  # in-process trigram index for match=substring
+    SNIPPET_NGRAM_INDEX_MAX_USERS: int = 256
+    SNIPPET_NGRAM_INDEX_TTL_SECONDS: int = 600
+
+    # Snippet import/export (NDJSON)
+    SNIPPET_IMPORT_BATCH_SIZE: int = 500  # lines validated and inserted per insert_many
+    SNIPPET_IMPORT_MAX_LINES: int = 100000
+    SNIPPET_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+    SNIPPET_IMPORT_MAX_ERRORS: int = 100  # per-line errors listed in the response
+    SNIPPET_EXPORT_BATCH_SIZE: int = 500
+    SNIPPET_BULK_MAX_ITEMS: int = 1000  # ids or items per bulk delete/update request
+
+    # Content-addressed code blobs (large snippet bodies and chat code context)
+    CODE_BLOB_ENABLED: bool = True  # existing blob references are read either way
+    CODE_BLOB_MIN_BYTES: int = 4096  # smaller bodies stay inline in their document
+    CODE_BLOB_COMPRESS_MIN_BYTES: int = 4096  # zstd-compress blobs from this size, if zstandard is installed
+    CODE_BLOB_ZSTD_LEVEL: int = 3
+    CODE_BLOB_CACHE_SIZE: int = 256  # decoded bodies kept per worker
+    CODE_BLOB_CACHE_TTL_SECONDS: int = 3600
+
+    # Instrumentation
+    METRICS_ENABLED: bool = True  # Prometheus text metrics on /metrics
+
+    # AI response cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 1024
+    AI_CACHE_TTL_SECONDS: int = 3600
+    AI_CACHE_MONGO_ENABLED: bool = False
+
+
+settings = Settings()
@@ -1,25 +1,195 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+import asyncio
+import threading
+import time
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from typing import Dict, List, Optional, Tuple
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
 from app.config import settings
 
+try:
+    import zstandard  # noqa: F401
+except ImportError:
+    zstandard = None
+
+try:
+    import snappy  # noqa: F401
+except ImportError:
+    snappy = None
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
 client: Optional[AsyncIOMotorClient] = None
+database: Optional[AsyncIOMotorDatabase] = None
+
+# Collection handles per (collection, profile), built once per client
+_collections: Dict[Tuple[str, str], AsyncIOMotorCollection] = {}
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """Connection pool counters fed by pymongo's pool events
+
+    Events fire on Motor's executor threads, so updates take a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkout_started = threading.local()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_failures: Dict[str, int] = {}
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        # Check-out runs start to finish on one thread
+        self._checkout_started.value = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout_started, "value", None)
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts += 1
+            if started is not None:
+                self.checkout_wait_seconds += time.perf_counter() - started
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def stats(self) -> dict:
+        """Current pool usage across all servers"""
+        with self._lock:
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+                "checkouts": self.checkouts,
+                "checkout_wait_seconds": self.checkout_wait_seconds,
+                "checkout_failures": dict(self.checkout_failures),
+                "pool_clears": self.pool_clears,
+            }
+
+
+# Global pool metrics, registered with every client
+pool_metrics = PoolMetrics()
+
+
+def available_compressors(requested: str) -> List[str]:
+    """Wire compressors from the comma-separated list that this install supports"""
+    supported = {"zstd": zstandard is not None, "snappy": snappy is not None, "zlib": True}
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    for name in names:
+        if not supported.get(name, False):
+            print(f"⚠️  MongoDB {name} compression unavailable, skipping")
+    return [name for name in names if supported.get(name, False)]
 
 
 async def connect_to_mongo():
-    """Connect to MongoDB"""
-    global client
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    """Connect to MongoDB, check it is reachable and open the minimum pool"""
+    global client, database
+    client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        maxConnecting=settings.MONGO_MAX_CONNECTING,
+        waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        compressors=available_compressors(settings.MONGO_COMPRESSORS),
+        zlibCompressionLevel=settings.MONGO_ZLIB_COMPRESSION_LEVEL,
+        event_listeners=[pool_metrics],
+    )
+    database = client[settings.DATABASE_NAME]
+    _collections.clear()
+    await warm_pool(settings.MONGO_WARM_CONNECTIONS)
     print("✅ Connected to MongoDB")
 
 
+async def warm_pool(connections: int):
+    """Ping the server, then hold `connections` concurrent pings to open that many sockets"""
+    await database.command("ping")
+    if connections > 1:
+        await asyncio.gather(*(database.command("ping") for _ in range(connections)))
+
+
 async def close_mongo_connection():
     """Close MongoDB connection"""
-    global client
+    global client, database
     if client:
         client.close()
+        client = None
+        database = None
+        _collections.clear()
         print("❌ MongoDB connection closed")
 
 
-def get_database():
+def get_database() -> AsyncIOMotorDatabase:
     """Get database instance"""
-    return client[settings.DATABASE_NAME]
+    return database
+
+
+def get_collection(collection_name: str, profile: str = "default") -> AsyncIOMotorCollection:
+    """Get a collection with the read preference and concerns of a MONGO_PROFILES entry"""
+    key = (collection_name, profile)
+    collection = _collections.get(key)
+    if collection is None:
+        options = settings.MONGO_PROFILES.get(profile, {})
+        kwargs = {}
+        if "read_preference" in options:
+            kwargs["read_preference"] = READ_PREFERENCES[options["read_preference"]]
+        if "read_concern" in options:
+            kwargs["read_concern"] = ReadConcern(options["read_concern"])
+        if {"w", "j", "wtimeout_ms"} & options.keys():
+            kwargs["write_concern"] = WriteConcern(
+                w=options.get("w"),
+                j=options.get("j"),
+                wtimeout=options.get("wtimeout_ms")
+            )
+        collection = database.get_collection(collection_name, **kwargs)
+        _collections[key] = collection
+    return collection
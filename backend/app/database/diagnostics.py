@@ -0,0 +1,140 @@
+"""
+Index and query-plan diagnostics
+
+Reconciles the declared indexes, then runs explain() on a representative
+shape of every repository query and flags collection scans, in-memory sorts
+and queries that examine far more documents than they return. Exits with
+status 1 if any query scans a collection. Run from the backend directory:
+
+    python -m app.database.diagnostics
+    python -m app.database.diagnostics --user-id 6554a0c2e13f4c1d2a3b4c5d --rebuild
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from app.database.connection import connect_to_mongo, close_mongo_connection, get_database
+from app.database.indexes import ensure_indexes
+from app.database.repositories import UserRepository, SnippetRepository, ChatRepository, BlobRepository
+
+REPOSITORIES = (UserRepository, SnippetRepository, ChatRepository, BlobRepository)
+
+# A query examining more than this many documents per result is flagged...
+MAX_EXAMINED_RATIO = 10
+# ...once it examines at least this many (tiny collections always look fine)
+MIN_EXAMINED = 100
+
+
+def plan_stages(plan: dict) -> List[dict]:
+    """Flatten a winning plan into its stages, root first"""
+    plan = plan.get("queryPlan", plan)  # slot-based engine wraps the classic tree
+    stages = [plan]
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages += plan_stages(child)
+    return stages
+
+
+def analyze(explain: dict) -> dict:
+    """Summarize an explain() result and list what looks wrong with the plan"""
+    stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+    names = [stage["stage"] for stage in stages]
+    stats = explain.get("executionStats", {})
+    examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+
+    problems = []
+    if "COLLSCAN" in names:
+        problems.append("collection scan")
+    if "SORT" in names:
+        problems.append("in-memory sort")
+    if examined >= MIN_EXAMINED and examined > MAX_EXAMINED_RATIO * max(returned, 1):
+        problems.append(f"examined {examined} documents for {returned} results")
+
+    return {
+        "plan": " <- ".join(names),
+        "indexes": sorted({stage["indexName"] for stage in stages if "indexName" in stage}),
+        "examined": examined,
+        "returned": returned,
+        "millis": stats.get("executionTimeMillis", 0),
+        "problems": problems,
+    }
+
+
+async def explain_query(collection_name: str, query: dict) -> dict:
+    """Explain a find with the query's filter, sort and limit"""
+    command = {"find": collection_name, "filter": query["filter"]}
+    if query.get("sort"):
+        command["sort"] = dict(query["sort"])
+    if query.get("limit"):
+        command["limit"] = query["limit"]
+    db = get_database()
+    return await db.command({"explain": command, "verbosity": "executionStats"})
+
+
+async def sample_user_id() -> str:
+    """A user that owns data, so plans are explained against real index ranges"""
+    db = get_database()
+    for collection_name in (SnippetRepository.collection_name, ChatRepository.collection_name):
+        doc = await db[collection_name].find_one({}, {"user_id": 1}, sort=[("_id", -1)])
+        if doc and doc.get("user_id"):
+            return doc["user_id"]
+    return str(ObjectId())
+
+
+async def run(user_id: Optional[str], rebuild: bool) -> bool:
+    """Print the index report and query plans; returns False if any query scans a collection"""
+    report = await ensure_indexes(rebuild=rebuild)
+    for key, label in (
+        ("created", "Created"),
+        ("rebuilt", "Rebuilt"),
+        ("conflicts", "Differs from declaration (use --rebuild)"),
+        ("undeclared", "Not declared by any repository"),
+        ("errors", "Error"),
+    ):
+        for name in report[key]:
+            print(f"{label}: {name}")
+
+    user_id = user_id or await sample_user_id()
+    print(f"\nExplaining queries for user {user_id}\n")
+
+    healthy = True
+    for repository in REPOSITORIES:
+        for name, query in repository.explain_queries(user_id).items():
+            label = f"{repository.collection_name}.{name}"
+            try:
+                result = analyze(await explain_query(repository.collection_name, query))
+            except PyMongoError as e:
+                print(f"✗ {label}: explain failed: {e}")
+                healthy = False
+                continue
+
+            mark = "✗" if result["problems"] else "✓"
+            print(f"{mark} {label}")
+            print(f"    plan: {result['plan']}")
+            print(f"    indexes: {', '.join(result['indexes']) or 'none'}")
+            print(f"    examined {result['examined']}, returned {result['returned']}, {result['millis']} ms")
+            for problem in result["problems"]:
+                print(f"    ! {problem}")
+            if "collection scan" in result["problems"]:
+                healthy = False
+    return healthy
+
+
+async def main(user_id: Optional[str], rebuild: bool) -> bool:
+    await connect_to_mongo()
+    try:
+        return await run(user_id, rebuild)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", default=None, help="explain queries for this user (default: a recent owner)")
+    parser.add_argument("--rebuild", action="store_true", help="drop and recreate indexes that differ from their declaration")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.user_id, args.rebuild)) else 1)
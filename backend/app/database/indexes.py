@@ -0,0 +1,118 @@
+"""
+Index registry, reconciled against MongoDB at startup
+
+Repositories declare their indexes next to their queries with
+`@declare_indexes` and an `indexes` class attribute; other modules that own
+a collection call `register_indexes`. `ensure_indexes` creates whatever is
+missing and reports indexes whose definition drifted from the declaration.
+"""
+
+from typing import Dict, List
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+from app.database.connection import get_database
+
+# Options that change what an index enforces or contains
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression", "weights")
+
+INDEXES: Dict[str, List[IndexModel]] = {}
+
+
+def register_indexes(collection_name: str, indexes: List[IndexModel]):
+    """Declare indexes for a collection"""
+    INDEXES.setdefault(collection_name, []).extend(indexes)
+
+
+def declare_indexes(cls):
+    """Class decorator registering a repository's `indexes` for its `collection_name`"""
+    register_indexes(cls.collection_name, cls.indexes)
+    return cls
+
+
+def _server_key(key) -> list:
+    """Key pattern as MongoDB reports it: text fields collapse into _fts/_ftsx"""
+    fields = []
+    for field, direction in key.items():
+        if direction == "text":
+            if ("_fts", "text") not in fields:
+                fields += [("_fts", "text"), ("_ftsx", 1)]
+            continue
+        fields.append((field, direction))
+    return fields
+
+
+def _same_index(declared: dict, existing: dict) -> bool:
+    """Compare a declared index document with an index_information() entry"""
+    key = [tuple(field) for field in existing["key"]]
+    if key != _server_key(declared["key"]) and key != list(declared["key"].items()):
+        return False
+    for option in COMPARED_OPTIONS:
+        if option == "weights" and (option not in declared or option not in existing):
+            continue  # only text indexes have weights
+        if declared.get(option, False) != existing.get(option, False):
+            return False
+    return True
+
+
+async def ensure_indexes(rebuild: bool = False) -> dict:
+    """Create missing indexes; with `rebuild`, drop and recreate drifted ones
+
+    Safe to run on every start and from several workers at once: creating an
+    index that already exists with the same definition is a no-op.
+    """
+    db = get_database()
+    report = {"created": [], "conflicts": [], "rebuilt": [], "undeclared": [], "errors": []}
+
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+        except PyMongoError as e:
+            report["errors"].append(f"{collection_name}: {e}")
+            continue
+
+        missing, drifted = [], []
+        for model in models:
+            declared = model.document
+            current = existing.get(declared["name"])
+            if current is None:
+                missing.append(model)
+            elif not _same_index(declared, current):
+                drifted.append(model)
+
+        declared_names = {model.document["name"] for model in models}
+        report["undeclared"] += [
+            f"{collection_name}.{name}" for name in existing if name != "_id_" and name not in declared_names
+        ]
+
+        try:
+            for model in drifted:
+                name = f"{collection_name}.{model.document['name']}"
+                if not rebuild:
+                    report["conflicts"].append(name)
+                    continue
+                await collection.drop_index(model.document["name"])
+                missing.append(model)
+                report["rebuilt"].append(name)
+            if missing:
+                await collection.create_indexes(missing)
+                report["created"] += [
+                    f"{collection_name}.{model.document['name']}"
+                    for model in missing
+                    if f"{collection_name}.{model.document['name']}" not in report["rebuilt"]
+                ]
+        except PyMongoError as e:
+            report["errors"].append(f"{collection_name}: {e}")
+
+    return report
+
+
+async def ensure_indexes_on_startup():
+    """Reconcile indexes, reporting problems without blocking startup"""
+    report = await ensure_indexes()
+    if report["created"]:
+        print(f"✅ Created indexes: {', '.join(report['created'])}")
+    for name in report["conflicts"]:
+        print(f"⚠️  Index {name} differs from its declaration; run `python -m app.database.diagnostics --rebuild`")
+    for error in report["errors"]:
+        print(f"⚠️  Index check failed for {error}")
@@ -0,0 +1,105 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+EPOCH = datetime(1970, 1, 1)
+
+# Newest first, with _id as a tiebreaker for documents created in the same millisecond
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def encode_cursor(created_at: datetime, doc_id: str) -> str:
+    """Build an opaque cursor pointing just past a document"""
+    millis = (created_at.replace(tzinfo=None) - EPOCH) // timedelta(milliseconds=1)
+    raw = f"{millis}:{doc_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        millis, doc_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").split(":", 1)
+        return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(doc_id)
+    except (binascii.Error, UnicodeError, ValueError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+def apply_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a query to documents that sort after the cursor"""
+    if not cursor:
+        return query
+
+    created_at, doc_id = decode_cursor(cursor)
+    keyset = {
+        "created_at": {"$lte": created_at},
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"_id": {"$lt": doc_id}}
+        ]
+    }
+    if "$or" in query or "created_at" in query:
+        return {"$and": [query, keyset]}
+    return {**query, **keyset}
+
+
+def next_cursor(items: list, limit: int) -> Optional[str]:
+    """Cursor for the page after `items`, or None when this is the last page"""
+    if len(items) < limit or not items:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last["created_at"], str(last["_id"]))
+    return encode_cursor(last.created_at, str(last.id))
+
+
+def build_projection(available: dict, fields: Optional[List[str]] = None) -> dict:
+    """Pick projection entries for the requested fields; raises ValueError on unknown fields"""
+    if not fields:
+        return dict(available)
+
+    unknown = [field for field in fields if field not in available and field != "id"]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    # created_at is always needed to build the next cursor
+    return {
+        name: value for name, value in available.items()
+        if name in fields or name == "created_at"
+    }
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated `fields=` query parameter"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Build an opaque cursor for relevance-ranked results, which have no stable sort key"""
+    return base64.urlsafe_b64encode(f"o:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """Decode an offset cursor (0 when absent); raises ValueError if it is malformed"""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, offset = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").split(":", 1)
+        if kind != "o" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def next_offset_cursor(items: list, limit: int, skip: int, cursor: Optional[str]) -> Optional[str]:
+    """Offset cursor for the page after `items`, or None when this is the last page"""
+    if len(items) < limit:
+        return None
+    return encode_offset_cursor(skip + decode_offset_cursor(cursor) + len(items))
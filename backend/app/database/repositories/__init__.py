@@ -1,5 +1,6 @@
 from .user_repository import UserRepository
 from .snippet_repository import SnippetRepository
 from .chat_repository import ChatRepository
+from .blob_repository import BlobRepository
 
-__all__ = ["UserRepository", "SnippetRepository", "ChatRepository"]
+__all__ = ["UserRepository", "SnippetRepository", "ChatRepository", "BlobRepository"]
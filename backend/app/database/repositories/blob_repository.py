@@ -0,0 +1,174 @@
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database.connection import get_collection
+from app.utils.metrics import instrument_repository
+from app.utils.lru import LRUCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DUPLICATE_KEY = 11000
+
+
+class MissingBlobError(Exception):
+    """Raised when a document references a code blob that no longer exists"""
+
+    def __init__(self, hashes: List[str]):
+        super().__init__(f"Missing code blobs: {', '.join(hashes)}")
+        self.hashes = hashes
+
+
+# Decoded bodies by hash; content-addressed blobs never change, so entries never go stale
+blob_cache = LRUCache(settings.CODE_BLOB_CACHE_SIZE, settings.CODE_BLOB_CACHE_TTL_SECONDS)
+
+_compressor = zstandard.ZstdCompressor(level=settings.CODE_BLOB_ZSTD_LEVEL) if zstandard else None
+_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def is_blob_sized(text: Optional[str]) -> bool:
+    """Whether a code body is large enough to live in the blob store"""
+    return (
+        settings.CODE_BLOB_ENABLED
+        and text is not None
+        # Cheap pre-check: a str never encodes to fewer bytes than it has characters
+        and (len(text) >= settings.CODE_BLOB_MIN_BYTES or len(text.encode("utf-8")) >= settings.CODE_BLOB_MIN_BYTES)
+    )
+
+
+def blob_hash(text: str) -> str:
+    """Content address of a code body"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _encode(data: bytes) -> dict:
+    if _compressor is not None and len(data) >= settings.CODE_BLOB_COMPRESS_MIN_BYTES:
+        compressed = _compressor.compress(data)
+        if len(compressed) < len(data):
+            return {"data": compressed, "encoding": "zstd"}
+    return {"data": data, "encoding": "raw"}
+
+
+def _decode(blob: dict) -> str:
+    data = blob["data"]
+    if blob["encoding"] == "zstd":
+        if _decompressor is None:
+            raise RuntimeError("zstandard is required to read compressed code blobs")
+        data = _decompressor.decompress(data)
+    return bytes(data).decode("utf-8")
+
+
+@instrument_repository
+class BlobRepository:
+    """Content-addressed store for large code bodies shared by snippets and chats
+
+    Each blob is keyed by the SHA-256 of its text and counts the documents
+    referencing it, so pasting the same file again only bumps a counter.
+    Counts err on the high side: a reference is taken before the owning
+    document is written, and a blob is only deleted once its count drops
+    to zero.
+    """
+    collection_name = "code_blobs"
+    db_profile = "default"
+    missing = 0  # references found pointing at no blob
+
+    # Every lookup is by _id (the content hash), so no secondary indexes
+
+    @staticmethod
+    def explain_queries(user_id: str) -> Dict[str, dict]:
+        """Representative filter/sort of every query, for the explain() diagnostics"""
+        return {
+            "by_hash": {"filter": {"_id": {"$in": [blob_hash(user_id)]}}},
+            "release": {"filter": {"_id": {"$in": [blob_hash(user_id)]}, "refs": {"$lte": 0}}},
+        }
+
+    @staticmethod
+    async def put_many(texts: List[str]) -> List[str]:
+        """Store code bodies, taking one reference per item; returns their hashes in order"""
+        hashes = [blob_hash(text) for text in texts]
+        counts = Counter(hashes)
+        if not counts:
+            return hashes
+
+        now = datetime.utcnow()
+        operations = []
+        for text, digest in dict(zip(texts, hashes)).items():
+            data = text.encode("utf-8")
+            operations.append(UpdateOne(
+                {"_id": digest},
+                {
+                    "$inc": {"refs": counts[digest]},
+                    "$setOnInsert": {**_encode(data), "size": len(data), "created_at": now}
+                },
+                upsert=True
+            ))
+            blob_cache.set(digest, text)
+
+        collection = get_collection(BlobRepository.collection_name, BlobRepository.db_profile)
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Two upserts of a new hash can race; the loser's retry finds the blob and just counts
+            errors = e.details.get("writeErrors", [])
+            if not errors or any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            await collection.bulk_write([operations[error["index"]] for error in errors], ordered=False)
+        return hashes
+
+    @staticmethod
+    async def get_many(hashes: Iterable[str]) -> Dict[str, str]:
+        """Code bodies by hash; hashes without a blob are left out"""
+        found = {}
+        missing = []
+        for digest in dict.fromkeys(hashes):
+            text = blob_cache.get(digest)
+            if text is None:
+                missing.append(digest)
+            else:
+                found[digest] = text
+        if missing:
+            collection = get_collection(BlobRepository.collection_name, BlobRepository.db_profile)
+            async for blob in collection.find({"_id": {"$in": missing}}, {"data": 1, "encoding": 1}):
+                text = _decode(blob)
+                blob_cache.set(blob["_id"], text)
+                found[blob["_id"]] = text
+        return found
+
+    @staticmethod
+    async def release(hashes: Iterable[str]):
+        """Drop one reference per item, deleting blobs nothing references any more"""
+        counts = Counter(hashes)
+        if not counts:
+            return
+        collection = get_collection(BlobRepository.collection_name, BlobRepository.db_profile)
+        await collection.bulk_write(
+            [UpdateOne({"_id": digest}, {"$inc": {"refs": -count}}) for digest, count in counts.items()],
+            ordered=False
+        )
+        # A concurrent put_many either lands first (refs > 0, kept) or re-creates the blob
+        await collection.delete_many({"_id": {"$in": list(counts)}, "refs": {"$lte": 0}})
+
+    @staticmethod
+    async def hydrate(docs: List[dict], ref_field: str, field: str) -> List[dict]:
+        """Fill `field` from the blob store in documents that hold a `ref_field` hash, in one query
+
+        Raises MissingBlobError rather than serving a body that silently went empty.
+        """
+        refs = [doc[ref_field] for doc in docs if doc.get(ref_field)]
+        if refs:
+            bodies = await BlobRepository.get_many(refs)
+            missing = [ref for ref in dict.fromkeys(refs) if ref not in bodies]
+            if missing:
+                BlobRepository.missing += len(missing)
+                print(f"⚠️  {len(missing)} code blobs referenced by {ref_field} are missing: {', '.join(missing)}")
+                raise MissingBlobError(missing)
+            for doc in docs:
+                if doc.get(ref_field):
+                    doc[field] = bodies[doc[ref_field]]
+        return docs
@@ -1,76 +1,255 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from bson import ObjectId
-from app.database.connection import get_database
-from app.database.schemas.chat import ChatHistoryInDB, ChatMessage
+from pymongo import IndexModel
+from app.config import settings
+from app.database.connection import get_collection
+from app.database.indexes import declare_indexes
+from app.database.repositories.blob_repository import BlobRepository, MissingBlobError, is_blob_sized
+from app.utils.metrics import instrument_repository
+from app.database.write_behind import chat_writer, WriteQueueFullError
+from app.database.pagination import KEYSET_SORT, apply_cursor, build_projection, encode_cursor
+from app.database.schemas.chat import ChatHistoryInDB, ChatHistorySummary, ChatMessage
 
 
+PREVIEW_CHARS = 200
+
+
+def _message_preview(field: str, index: int) -> dict:
+    """Stored opening preview, computed from the messages for chats saved before it was stored"""
+    return {"$ifNull": [
+        f"${field}",
+        {"$substrCP": [{"$ifNull": [{"$arrayElemAt": ["$messages.content", index]}, ""]}, 0, PREVIEW_CHARS]}
+    ]}
+
+
+def _prepare_new_chat(chat_data: dict):
+    """Stamp a new chat with what list views need once older messages are trimmed"""
+    messages = chat_data.get("messages", [])
+    chat_data["created_at"] = datetime.utcnow()
+    chat_data.setdefault("message_total", len(messages))
+    # The opening exchange, kept apart from messages, which lose their front when trimmed
+    for field, message in zip(("prompt_preview", "response_preview"), messages):
+        chat_data.setdefault(field, message["content"][:PREVIEW_CHARS])
+
+
+@declare_indexes
+@instrument_repository
 class ChatRepository:
     collection_name = "chat_history"
+    db_profile = "fast_write"  # high volume, losing a chat on failover is tolerable
+
+    # Lookups by _id + user_id are served by the _id index
+    indexes = [
+        IndexModel([("user_id", 1), ("created_at", -1), ("_id", -1)]),
+    ]
+
+    # Computed server-side so list views never pull full messages or code context
+    summary_projection = {
+        "mode": 1,
+        "prompt_preview": _message_preview("prompt_preview", 0),
+        "response_preview": _message_preview("response_preview", 1),
+        "message_count": {"$ifNull": ["$message_total", {"$size": {"$ifNull": ["$messages", []]}}]},
+        "has_code_context": {"$cond": [{"$ifNull": ["$code_context", "$code_context_ref"]}, True, False]},
+        "created_at": 1,
+    }
+
+    @staticmethod
+    def explain_queries(user_id: str) -> Dict[str, dict]:
+        """Representative filter/sort of every query, for the explain() diagnostics"""
+        return {
+            "by_id": {"filter": {"_id": ObjectId(), "user_id": user_id}, "limit": 1},
+            "list": {"filter": {"user_id": user_id}, "sort": KEYSET_SORT, "limit": 50},
+            "list_after_cursor": {
+                "filter": apply_cursor({"user_id": user_id}, encode_cursor(datetime.utcnow(), str(ObjectId()))),
+                "sort": KEYSET_SORT,
+                "limit": 50
+            },
+        }
 
     @staticmethod
     async def create_chat_history(chat_data: dict) -> ChatHistoryInDB:
         """Create a new chat history entry"""
-        db = get_database()
-        chat_data["created_at"] = datetime.utcnow()
-        result = await db[ChatRepository.collection_name].insert_one(chat_data)
-        chat_data["_id"] = str(result.inserted_id)
-        return ChatHistoryInDB(**chat_data)
+        code_context = chat_data.get("code_context")
+        _prepare_new_chat(chat_data)
+        refs = await ChatRepository._store_code_context(chat_data)
+        chat_id = await ChatRepository._insert(chat_data, refs)
+        return ChatHistoryInDB(**{**chat_data, "_id": str(chat_id), "code_context": code_context})
+
+    @staticmethod
+    async def _insert(chat_data: dict, refs: List[str]) -> ObjectId:
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
+        try:
+            result = await collection.insert_one(chat_data)
+        except Exception:
+            await BlobRepository.release(refs)
+            raise
+        return result.inserted_id
+
+    @staticmethod
+    async def _store_code_context(chat_data: dict) -> List[str]:
+        """Move a large code context into the blob store, in place; returns the references taken"""
+        if not is_blob_sized(chat_data.get("code_context")):
+            return []
+        refs = await BlobRepository.put_many([chat_data.pop("code_context")])
+        chat_data["code_context_ref"] = refs[0]
+        return refs
+
+    @staticmethod
+    async def queue_chat_history(chat_data: dict) -> ChatHistoryInDB:
+        """Create a chat history entry through the write-behind queue
+
+        The id is generated up front and returned immediately; the insert is
+        batched in the background. Falls back to an inline insert when the
+        queue is full or not running. A queued chat whose insert is finally
+        dropped keeps its code blob reference, which only delays that blob's
+        deletion.
+        """
+        code_context = chat_data.get("code_context")
+        _prepare_new_chat(chat_data)
+        refs = await ChatRepository._store_code_context(chat_data)
+        try:
+            chat_id = chat_writer.enqueue(chat_data)
+        except WriteQueueFullError:
+            chat_id = await ChatRepository._insert(chat_data, refs)
+        return ChatHistoryInDB(**{**chat_data, "_id": str(chat_id), "code_context": code_context})
+
+    @staticmethod
+    async def _wait_if_pending(chat_id: str):
+        """Make sure a chat still sitting in the write-behind queue is written"""
+        if ObjectId.is_valid(chat_id) and chat_writer.is_pending(ObjectId(chat_id)):
+            await chat_writer.wait_written(ObjectId(chat_id))
 
     @staticmethod
     async def get_chat_history_by_id(chat_id: str, user_id: str) -> Optional[ChatHistoryInDB]:
         """Get chat history by ID for a specific user"""
-        db = get_database()
+        await ChatRepository._wait_if_pending(chat_id)
+        return await ChatRepository._find_chat(chat_id, user_id)
+
+    @staticmethod
+    async def _find_chat(chat_id: str, user_id: str) -> Optional[ChatHistoryInDB]:
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
         try:
-            chat = await db[ChatRepository.collection_name].find_one({
+            chat = await collection.find_one({
                 "_id": ObjectId(chat_id),
                 "user_id": user_id
             })
             if chat:
                 chat["_id"] = str(chat["_id"])
+                await BlobRepository.hydrate([chat], "code_context_ref", "code_context")
                 return ChatHistoryInDB(**chat)
+        except MissingBlobError:
+            raise
         except Exception:
             pass
         return None
 
     @staticmethod
-    async def get_user_chat_history(user_id: str, skip: int = 0, limit: int = 50) -> List[ChatHistoryInDB]:
-        """Get all chat history for a user"""
-        db = get_database()
-        cursor = db[ChatRepository.collection_name].find({"user_id": user_id}).sort("created_at", -1).skip(skip).limit(limit)
+    async def get_user_chat_history(
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> List[ChatHistoryInDB]:
+        """Get all chat history for a user, newest first, starting after `cursor`"""
+        docs = await ChatRepository.get_user_chat_history_documents(user_id, skip, limit, cursor)
         chats = []
-        async for chat in cursor:
+        for chat in docs:
             chat["_id"] = str(chat["_id"])
             chats.append(ChatHistoryInDB(**chat))
         return chats
 
     @staticmethod
-    async def add_message_to_chat(chat_id: str, user_id: str, message: ChatMessage) -> Optional[ChatHistoryInDB]:
-        """Add a message to existing chat history"""
-        db = get_database()
+    async def get_user_chat_history_documents(
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> List[dict]:
+        """Get raw chat history documents for a user, skipping model validation"""
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
+        query = apply_cursor({"user_id": user_id}, cursor)
+        cursor = collection.find(query).sort(KEYSET_SORT).skip(skip).limit(limit)
+        return await BlobRepository.hydrate(await cursor.to_list(length=limit), "code_context_ref", "code_context")
+
+    @staticmethod
+    async def add_message_to_chat(chat_id: str, user_id: str, *messages: ChatMessage) -> Optional[ChatHistoryInDB]:
+        """Add one or more messages to existing chat history, keeping only the newest CHAT_MAX_STORED_MESSAGES"""
+        await ChatRepository._wait_if_pending(chat_id)
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
         try:
-            result = await db[ChatRepository.collection_name].find_one_and_update(
+            result = await collection.find_one_and_update(
                 {"_id": ObjectId(chat_id), "user_id": user_id},
-                {"$push": {"messages": message.dict()}},
+                {
+                    "$push": {"messages": {
+                        "$each": [message.dict() for message in messages],
+                        "$slice": -settings.CHAT_MAX_STORED_MESSAGES
+                    }},
+                    "$inc": {"message_total": len(messages)}
+                },
                 return_document=True
             )
             if result:
                 result["_id"] = str(result["_id"])
+                await BlobRepository.hydrate([result], "code_context_ref", "code_context")
                 return ChatHistoryInDB(**result)
+        except MissingBlobError:
+            raise
         except Exception:
             pass
         return None
 
+    @staticmethod
+    async def update_chat_summary(chat_id: str, user_id: str, summary: str, summary_upto_index: int) -> bool:
+        """Store the rolling summary covering the first `summary_upto_index` messages ever added"""
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
+        try:
+            result = await collection.update_one(
+                {"_id": ObjectId(chat_id), "user_id": user_id},
+                {
+                    "$set": {"summary": summary, "summary_upto_index": summary_upto_index},
+                    "$unset": {"summary_upto": ""}
+                }
+            )
+            return result.matched_count > 0
+        except Exception:
+            pass
+        return False
+
     @staticmethod
     async def delete_chat_history(chat_id: str, user_id: str) -> bool:
         """Delete a chat history entry"""
-        db = get_database()
+        await ChatRepository._wait_if_pending(chat_id)
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
         try:
-            result = await db[ChatRepository.collection_name].delete_one({
-                "_id": ObjectId(chat_id),
-                "user_id": user_id
-            })
-            return result.deleted_count > 0
+            deleted = await collection.find_one_and_delete(
+                {"_id": ObjectId(chat_id), "user_id": user_id},
+                {"code_context_ref": 1}
+            )
+            if deleted is not None and deleted.get("code_context_ref"):
+                await BlobRepository.release([deleted["code_context_ref"]])
+            return deleted is not None
         except Exception:
             pass
         return False
+
+    @staticmethod
+    async def get_user_chat_summaries(
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[ChatHistorySummary]:
+        """Get chat summaries (previews instead of full messages) for a user"""
+        collection = get_collection(ChatRepository.collection_name, ChatRepository.db_profile)
+        projection = build_projection(ChatRepository.summary_projection, fields)
+        cursor = collection.find(
+            apply_cursor({"user_id": user_id}, cursor),
+            projection
+        ).sort(KEYSET_SORT).skip(skip).limit(limit)
+        chats = []
+        async for chat in cursor:
+            chat["_id"] = str(chat["_id"])
+            chats.append(ChatHistorySummary(**chat))
+        return chats
@@ -1,95 +1,602 @@
-from typing import Optional, List
+import asyncio
+import re
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from datetime import datetime
 from bson import ObjectId
-from app.database.connection import get_database
-from app.database.schemas.snippet import SnippetInDB
+from pymongo import IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, WriteError
+from app.config import settings
+from app.database.connection import get_collection
+from app.database.indexes import declare_indexes
+from app.database.repositories.blob_repository import BlobRepository, MissingBlobError, is_blob_sized
+from app.utils.metrics import instrument_repository
+from app.database.pagination import KEYSET_SORT, apply_cursor, build_projection, decode_offset_cursor, encode_cursor
+from app.database.schemas.snippet import SnippetInDB, SnippetSummary
+from app.utils.lru import LRUCache
+from app.utils.ngram_index import NgramIndex, searchable_text
 
 
+PREVIEW_CHARS = 200
+
+# Relevance first, newest first among equally relevant results
+TEXT_SEARCH_SORT = [("score", {"$meta": "textScore"}), ("created_at", -1), ("_id", -1)]
+
+# Per-user trigram indexes for substring/fuzzy search, built lazily from Mongo
+ngram_indexes = LRUCache(settings.SNIPPET_NGRAM_INDEX_MAX_USERS, settings.SNIPPET_NGRAM_INDEX_TTL_SECONDS)
+
+
+@declare_indexes
+@instrument_repository
 class SnippetRepository:
     collection_name = "snippets"
+    db_profile = "default"
+
+    indexes = [
+        # Listing, keyset pagination and every per-user lookup (the user_id prefix
+        # also bounds the substring-search $or to one user's snippets)
+        IndexModel([("user_id", 1), ("created_at", -1), ("_id", -1)]),
+        IndexModel("tags"),
+        IndexModel(
+            # Bodies moved to the blob store are searchable through their stored preview
+            [
+                ("user_id", 1), ("title", "text"), ("description", "text"), ("tags", "text"),
+                ("code", "text"), ("code_preview", "text")
+            ],
+            weights={"title": 10, "tags": 5, "description": 3, "code": 1, "code_preview": 1},
+            default_language="none",
+            name="snippets_text"
+        ),
+    ]
+
+    # Computed server-side so list views never pull full code bodies from Mongo;
+    # bodies in the blob store have their preview and length stored at write time
+    summary_projection = {
+        "title": 1,
+        "language": 1,
+        "description": 1,
+        "tags": 1,
+        "code_preview": {"$ifNull": ["$code_preview", {"$substrCP": ["$code", 0, PREVIEW_CHARS]}]},
+        "code_length": {"$ifNull": ["$code_length", {"$strLenCP": "$code"}]},
+        "created_at": 1,
+        "updated_at": 1,
+    }
+
+    @staticmethod
+    def explain_queries(user_id: str) -> Dict[str, dict]:
+        """Representative filter/sort of every query, for the explain() diagnostics"""
+        by_id = {"_id": ObjectId(), "user_id": user_id}
+        return {
+            "by_id": {"filter": by_id, "limit": 1},
+            "list": {"filter": {"user_id": user_id}, "sort": KEYSET_SORT, "limit": 50},
+            "list_after_cursor": {
+                "filter": apply_cursor({"user_id": user_id}, encode_cursor(datetime.utcnow(), str(ObjectId()))),
+                "sort": KEYSET_SORT,
+                "limit": 50
+            },
+            "search_text": {
+                "filter": {"user_id": user_id, "$text": {"$search": "function"}},
+                "sort": TEXT_SEARCH_SORT,
+                "limit": 50
+            },
+            "search_substring_scan": {
+                "filter": {
+                    "user_id": user_id,
+                    "$or": [{"title": {"$regex": "function", "$options": "i"}}, {"tags": "function"}]
+                },
+                "sort": KEYSET_SORT,
+                "limit": 50
+            },
+            "search_substring_ids": {"filter": {"_id": {"$in": [ObjectId()]}, "user_id": user_id}},
+            "ngram_index_build": {"filter": {"user_id": user_id}},
+        }
 
     @staticmethod
     async def create_snippet(snippet_data: dict) -> SnippetInDB:
         """Create a new snippet"""
-        db = get_database()
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        code = snippet_data["code"]
         snippet_data["created_at"] = datetime.utcnow()
         snippet_data["updated_at"] = datetime.utcnow()
-        result = await db[SnippetRepository.collection_name].insert_one(snippet_data)
+        refs = await SnippetRepository._store_code([snippet_data])
+        try:
+            result = await collection.insert_one(snippet_data)
+        except Exception:
+            await BlobRepository.release(refs)
+            raise
         snippet_data["_id"] = str(result.inserted_id)
-        return SnippetInDB(**snippet_data)
+        SnippetRepository._reindex(snippet_data)
+        return SnippetInDB(**{**snippet_data, "code": code})
+
+    @staticmethod
+    async def insert_snippets(user_id: str, snippets: List[dict]) -> Dict[int, str]:
+        """Insert many snippets for one user in a single unordered batch
+
+        Returns the error message for each failed position in `snippets`;
+        the rest were written.
+        """
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        now = datetime.utcnow()
+        for snippet in snippets:
+            snippet["user_id"] = user_id
+            snippet["created_at"] = snippet.get("created_at") or now
+            snippet["updated_at"] = snippet.get("updated_at") or snippet["created_at"]
+        refs = await SnippetRepository._store_code(snippets)
+        errors = {}
+        try:
+            await collection.insert_many(snippets, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+            await BlobRepository.release(snippets[i]["code_ref"] for i in errors if "code_ref" in snippets[i])
+        except Exception:
+            await BlobRepository.release(refs)
+            raise
+        # Rebuilt lazily on the next substring search
+        ngram_indexes.pop(user_id)
+        return errors
+
+    @staticmethod
+    async def iter_user_snippet_documents(user_id: str, batch_size: int) -> AsyncIterator[List[dict]]:
+        """Stream a user's snippets in batches, newest first, holding one batch at a time"""
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        cursor = collection.find({"user_id": user_id}, {"user_id": 0}).sort(KEYSET_SORT).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield await BlobRepository.hydrate(batch, "code_ref", "code")
+                batch = []
+        if batch:
+            yield await BlobRepository.hydrate(batch, "code_ref", "code")
 
     @staticmethod
     async def get_snippet_by_id(snippet_id: str, user_id: str) -> Optional[SnippetInDB]:
         """Get snippet by ID for a specific user"""
-        db = get_database()
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
         try:
-            snippet = await db[SnippetRepository.collection_name].find_one({
+            snippet = await collection.find_one({
                 "_id": ObjectId(snippet_id),
                 "user_id": user_id
             })
             if snippet:
                 snippet["_id"] = str(snippet["_id"])
+                await BlobRepository.hydrate([snippet], "code_ref", "code")
                 return SnippetInDB(**snippet)
+        except MissingBlobError:
+            raise
         except Exception:
             pass
         return None
 
     @staticmethod
-    async def get_user_snippets(user_id: str, skip: int = 0, limit: int = 50) -> List[SnippetInDB]:
-        """Get all snippets for a user"""
-        db = get_database()
-        cursor = db[SnippetRepository.collection_name].find({"user_id": user_id}).sort("created_at", -1).skip(skip).limit(limit)
+    async def get_user_snippets(
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> List[SnippetInDB]:
+        """Get all snippets for a user, newest first, starting after `cursor`"""
+        docs = await SnippetRepository.get_user_snippet_documents(user_id, skip, limit, cursor)
         snippets = []
-        async for snippet in cursor:
+        for snippet in docs:
             snippet["_id"] = str(snippet["_id"])
             snippets.append(SnippetInDB(**snippet))
         return snippets
 
+    @staticmethod
+    async def get_user_snippet_documents(
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> List[dict]:
+        """Get raw snippet documents for a user, skipping model validation"""
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        query = apply_cursor({"user_id": user_id}, cursor)
+        cursor = collection.find(query).sort(KEYSET_SORT).skip(skip).limit(limit)
+        return await BlobRepository.hydrate(await cursor.to_list(length=limit), "code_ref", "code")
+
     @staticmethod
     async def update_snippet(snippet_id: str, user_id: str, update_data: dict) -> Optional[SnippetInDB]:
         """Update a snippet"""
-        db = get_database()
         try:
             update_data["updated_at"] = datetime.utcnow()
-            result = await db[SnippetRepository.collection_name].find_one_and_update(
+            result = await SnippetRepository._apply_update(
                 {"_id": ObjectId(snippet_id), "user_id": user_id},
-                {"$set": update_data},
-                return_document=True
+                update_data
             )
             if result:
                 result["_id"] = str(result["_id"])
+                SnippetRepository._reindex(result)
+                await BlobRepository.hydrate([result], "code_ref", "code")
                 return SnippetInDB(**result)
+        except MissingBlobError:
+            raise
         except Exception:
             pass
         return None
 
+    @staticmethod
+    async def _store_code(snippets: List[dict]) -> List[str]:
+        """Move large code bodies into the blob store, in place; returns the references taken"""
+        large = [snippet for snippet in snippets if is_blob_sized(snippet.get("code"))]
+        if not large:
+            return []
+        refs = await BlobRepository.put_many([snippet["code"] for snippet in large])
+        for snippet, ref in zip(large, refs):
+            code = snippet.pop("code")
+            snippet["code_ref"] = ref
+            snippet["code_preview"] = code[:PREVIEW_CHARS]
+            snippet["code_length"] = len(code)
+        return refs
+
+    @staticmethod
+    async def _apply_update(query: dict, fields: dict) -> Optional[dict]:
+        """$set `fields` on one snippet, swapping its code blob reference atomically
+
+        Returns the updated document, without hydrating the code.
+        """
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        replaces_code = "code" in fields
+        refs = await SnippetRepository._store_code([fields])
+        update = {"$set": fields}
+        if refs:
+            update["$unset"] = {"code": ""}
+        elif replaces_code:
+            update["$unset"] = {"code_ref": "", "code_preview": "", "code_length": ""}
+        try:
+            # The old reference is only known, and released, once this write has replaced it
+            before = await collection.find_one_and_update(query, update, return_document=ReturnDocument.BEFORE)
+        except Exception:
+            await BlobRepository.release(refs)
+            raise
+        if before is None:
+            await BlobRepository.release(refs)
+            return None
+        if replaces_code and before.get("code_ref"):
+            await BlobRepository.release([before["code_ref"]])
+        after = {**before, **fields}
+        for field in update.get("$unset", {}):
+            after.pop(field, None)
+        return after
+
     @staticmethod
     async def delete_snippet(snippet_id: str, user_id: str) -> bool:
         """Delete a snippet"""
-        db = get_database()
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
         try:
-            result = await db[SnippetRepository.collection_name].delete_one({
-                "_id": ObjectId(snippet_id),
-                "user_id": user_id
-            })
-            return result.deleted_count > 0
+            deleted = await collection.find_one_and_delete(
+                {"_id": ObjectId(snippet_id), "user_id": user_id},
+                {"code_ref": 1}
+            )
+            if deleted is not None:
+                index = ngram_indexes.get(user_id)
+                if index is not None:
+                    index.remove(snippet_id)
+                if deleted.get("code_ref"):
+                    await BlobRepository.release([deleted["code_ref"]])
+            return deleted is not None
         except Exception:
             pass
         return False
 
     @staticmethod
-    async def search_snippets(user_id: str, query: str, skip: int = 0, limit: int = 50) -> List[SnippetInDB]:
-        """Search snippets by title or tags"""
-        db = get_database()
-        cursor = db[SnippetRepository.collection_name].find({
-            "user_id": user_id,
-            "$or": [
-                {"title": {"$regex": query, "$options": "i"}},
-                {"tags": {"$in": [query]}}
-            ]
-        }).sort("created_at", -1).skip(skip).limit(limit)
+    async def bulk_delete_snippets(user_id: str, snippet_ids: List[str]) -> Dict[str, str]:
+        """Delete many of a user's snippets at once; returns a status per id
+
+        Statuses are "deleted", "not_found" or "invalid_id".
+        """
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        results, owned = await SnippetRepository._owned_ids(user_id, snippet_ids)
+        if owned:
+            # Snippets with inline code go in one delete_many. Blob-backed ones, and any that
+            # gained a blob since they were read, are deleted one by one so each released
+            # reference is the one the deleted document actually held.
+            inline = [doc["_id"] for doc in owned.values() if not doc.get("code_ref")]
+            one_by_one = [doc["_id"] for doc in owned.values() if doc.get("code_ref")]
+            if inline:
+                result = await collection.delete_many(
+                    {"_id": {"$in": inline}, "user_id": user_id, "code_ref": {"$exists": False}}
+                )
+                if result.deleted_count < len(inline):
+                    one_by_one += inline
+            if one_by_one:
+                deleted = await asyncio.gather(*(
+                    collection.find_one_and_delete({"_id": oid, "user_id": user_id}, {"code_ref": 1})
+                    for oid in one_by_one
+                ))
+                await BlobRepository.release(doc["code_ref"] for doc in deleted if doc and doc.get("code_ref"))
+            ngram_indexes.pop(user_id)
+        for snippet_id in owned:
+            results[snippet_id] = "deleted"
+        return results
+
+    @staticmethod
+    async def bulk_update_snippets(user_id: str, updates: List[Tuple[str, dict]]) -> Dict[str, str]:
+        """Apply a different $set to each of a user's snippets in one bulk_write
+
+        Fields given twice for the same id are merged, later ones winning.
+        Statuses are "updated", "not_found", "invalid_id" or the write error.
+        """
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        merged: Dict[str, dict] = {}
+        for snippet_id, fields in updates:
+            merged.setdefault(snippet_id, {}).update(fields)
+        results, owned = await SnippetRepository._owned_ids(user_id, list(merged))
+
+        now = datetime.utcnow()
+        # New code bodies may swap blob references, which needs the old document: those
+        # updates run one by one, everything else goes in a single bulk_write
+        operation_ids = [snippet_id for snippet_id in owned if "code" not in merged[snippet_id]]
+        code_ids = [snippet_id for snippet_id in owned if "code" in merged[snippet_id]]
+        operations = [
+            UpdateOne(
+                {"_id": owned[snippet_id]["_id"], "user_id": user_id},
+                {"$set": {**merged[snippet_id], "updated_at": now}}
+            )
+            for snippet_id in operation_ids
+        ]
+        for snippet_id in owned:
+            results[snippet_id] = "updated"
+        if operations:
+            try:
+                await collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    results[operation_ids[error["index"]]] = error["errmsg"]
+        if code_ids:
+            updated = await asyncio.gather(
+                *(
+                    SnippetRepository._apply_update(
+                        {"_id": owned[snippet_id]["_id"], "user_id": user_id},
+                        {**merged[snippet_id], "updated_at": now}
+                    )
+                    for snippet_id in code_ids
+                ),
+                return_exceptions=True
+            )
+            for snippet_id, result in zip(code_ids, updated):
+                if isinstance(result, Exception):
+                    results[snippet_id] = str(result)
+                elif result is None:
+                    results[snippet_id] = "not_found"
+        if operations or code_ids:
+            ngram_indexes.pop(user_id)
+        return results
+
+    @staticmethod
+    async def update_snippet_tags(
+        user_id: str,
+        add: List[str],
+        remove: List[str],
+        snippet_ids: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        language: Optional[str] = None
+    ) -> dict:
+        """Add and remove tags on every snippet matching a filter
+
+        Returns how many snippets matched, how many gained a tag (`added`)
+        and how many lost one (`removed`), plus any write errors.
+        """
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        query = SnippetRepository._bulk_filter(user_id, snippet_ids, tags, language)
+        now = datetime.utcnow()
+        # $addToSet and $pull can't touch the same field in one update, so run them in order.
+        # Each phase only matches snippets it changes, so its modified count is exact and
+        # untouched snippets keep their updated_at.
+        phases = []
+        if add:
+            phases.append((
+                "added",
+                {"$and": [query, {"tags": {"$not": {"$all": add}}}]},
+                {"$addToSet": {"tags": {"$each": add}}, "$set": {"updated_at": now}}
+            ))
+        if remove:
+            phases.append((
+                "removed",
+                {"$and": [query, {"tags": {"$in": remove}}]},
+                {"$pull": {"tags": {"$in": remove}}, "$set": {"updated_at": now}}
+            ))
+        result = {"matched": 0, "added": 0, "removed": 0, "errors": []}
+        if not phases:
+            return result
+
+        result["matched"] = await collection.count_documents(query)
+        for name, phase_query, update in phases:
+            try:
+                write = await collection.update_many(phase_query, update)
+            except WriteError as e:
+                # Like an ordered bulk write: report the failure and skip the later phase
+                result["errors"].append(e.details.get("errmsg", str(e)) if e.details else str(e))
+                break
+            result[name] = write.modified_count
+        ngram_indexes.pop(user_id)
+        return result
+
+    @staticmethod
+    def _bulk_filter(
+        user_id: str,
+        snippet_ids: Optional[List[str]],
+        tags: Optional[List[str]],
+        language: Optional[str]
+    ) -> dict:
+        """Query for a user's snippets matching any given ids, any given tags and the language"""
+        query = {"user_id": user_id}
+        if snippet_ids is not None:
+            query["_id"] = {"$in": [ObjectId(i) for i in snippet_ids if ObjectId.is_valid(i)]}
+        if tags:
+            query["tags"] = {"$in": tags}
+        if language:
+            query["language"] = language
+        return query
+
+    @staticmethod
+    async def _owned_ids(user_id: str, snippet_ids: List[str]) -> Tuple[Dict[str, str], Dict[str, dict]]:
+        """Split ids into invalid/not-found statuses and the snippets this user owns
+
+        Owned snippets map to their `_id` and `code_ref`.
+        """
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        results = {}
+        valid = {}
+        for snippet_id in dict.fromkeys(snippet_ids):
+            if ObjectId.is_valid(snippet_id):
+                valid[snippet_id] = ObjectId(snippet_id)
+            else:
+                results[snippet_id] = "invalid_id"
+        found = {}
+        if valid:
+            cursor = collection.find({"_id": {"$in": list(valid.values())}, "user_id": user_id}, {"code_ref": 1})
+            found = {doc["_id"]: doc async for doc in cursor}
+        owned = {}
+        for snippet_id, oid in valid.items():
+            if oid in found:
+                owned[snippet_id] = found[oid]
+            else:
+                results[snippet_id] = "not_found"
+        return results, owned
+
+    @staticmethod
+    async def search_snippets(
+        user_id: str,
+        query: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        match: str = "text"
+    ) -> List[SnippetInDB]:
+        """Search snippets, ranked by relevance
+
+        `match="text"` uses the Mongo text index over title, description, tags
+        and code. `match="substring"` finds substrings and near misses in titles,
+        descriptions and tags through the per-user trigram index.
+        """
+        docs = await SnippetRepository.search_snippet_documents(user_id, query, skip, limit, cursor, match)
+        return [SnippetInDB(**doc) for doc in docs]
+
+    @staticmethod
+    async def search_snippet_documents(
+        user_id: str,
+        query: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        match: str = "text"
+    ) -> List[dict]:
+        """Search snippets, returning raw documents and skipping model validation"""
+        offset = skip + decode_offset_cursor(cursor)
+        docs = await SnippetRepository._search_docs(user_id, query, offset, limit, match)
+        return await BlobRepository.hydrate(docs, "code_ref", "code")
+
+    @staticmethod
+    async def get_user_snippet_summaries(
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        match: str = "text"
+    ) -> List[SnippetSummary]:
+        """Get snippet summaries (previews instead of full code) for a user"""
+        projection = build_projection(SnippetRepository.summary_projection, fields)
+        if search:
+            offset = skip + decode_offset_cursor(cursor)
+            docs = await SnippetRepository._search_docs(user_id, search, offset, limit, match, projection)
+            return [SnippetSummary(**doc) for doc in docs]
+
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        cursor = collection.find(
+            apply_cursor({"user_id": user_id}, cursor),
+            projection
+        ).sort(KEYSET_SORT).skip(skip).limit(limit)
         snippets = []
         async for snippet in cursor:
             snippet["_id"] = str(snippet["_id"])
-            snippets.append(SnippetInDB(**snippet))
+            snippets.append(SnippetSummary(**snippet))
         return snippets
+
+    @staticmethod
+    async def _search_docs(
+        user_id: str,
+        query: str,
+        offset: int,
+        limit: int,
+        match: str,
+        projection: Optional[dict] = None
+    ) -> List[dict]:
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+
+        if match == "substring" and settings.SNIPPET_NGRAM_INDEX_ENABLED:
+            index = await SnippetRepository._get_ngram_index(user_id)
+            ids = index.search(query, offset, limit)
+            if not ids:
+                return []
+            cursor = collection.find(
+                {"_id": {"$in": [ObjectId(doc_id) for doc_id in ids]}, "user_id": user_id},
+                projection
+            )
+            by_id = {}
+            async for doc in cursor:
+                doc["_id"] = str(doc["_id"])
+                by_id[doc["_id"]] = doc
+            return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+        if match == "substring":
+            # Index disabled: escaped, case-insensitive scan of the user's titles
+            filters = {
+                "user_id": user_id,
+                "$or": [
+                    {"title": {"$regex": re.escape(query), "$options": "i"}},
+                    {"tags": query}
+                ]
+            }
+            cursor = collection.find(filters, projection).sort(KEYSET_SORT)
+        else:
+            terms = SnippetRepository._text_search_terms(query)
+            if not terms:
+                return []
+            filters = {"user_id": user_id, "$text": {"$search": terms}}
+            cursor = collection.find(filters, projection).sort(TEXT_SEARCH_SORT)
+
+        docs = []
+        async for doc in cursor.skip(offset).limit(limit):
+            doc["_id"] = str(doc["_id"])
+            docs.append(doc)
+        return docs
+
+    @staticmethod
+    def _text_search_terms(query: str) -> str:
+        """Plain terms for $text: drop phrase quotes and negation prefixes"""
+        return " ".join(term.lstrip("-") for term in query.replace('"', " ").split() if term.lstrip("-"))
+
+    @staticmethod
+    async def _get_ngram_index(user_id: str) -> NgramIndex:
+        index = ngram_indexes.get(user_id)
+        if index is not None:
+            return index
+
+        collection = get_collection(SnippetRepository.collection_name, SnippetRepository.db_profile)
+        index = NgramIndex()
+        cursor = collection.find(
+            {"user_id": user_id},
+            {"title": 1, "description": 1, "tags": 1, "created_at": 1}
+        )
+        async for doc in cursor:
+            index.add(
+                str(doc["_id"]),
+                searchable_text(doc.get("title"), doc.get("description"), doc.get("tags")),
+                doc["created_at"]
+            )
+        ngram_indexes.set(user_id, index)
+        return index
+
+    @staticmethod
+    def _reindex(snippet: dict):
+        """Keep an already-built trigram index in step with a written snippet"""
+        index = ngram_indexes.get(snippet["user_id"])
+        if index is not None:
+            index.add(
+                str(snippet["_id"]),
+                searchable_text(snippet.get("title"), snippet.get("description"), snippet.get("tags")),
+                snippet["created_at"]
+            )
@@ -1,26 +1,49 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from bson import ObjectId
-from app.database.connection import get_database
+from pymongo import IndexModel
+from app.config import settings
+from app.database.connection import get_collection
+from app.database.indexes import declare_indexes
+from app.utils.metrics import instrument_repository
 from app.database.schemas.user import UserInDB
+from app.utils.lru import LRUCache
 
+# Authenticated principals keyed on user id; invalidated on account changes
+user_cache = LRUCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
 
+
+@declare_indexes
+@instrument_repository
 class UserRepository:
     collection_name = "users"
+    db_profile = "durable"  # accounts must survive a failover
+
+    indexes = [
+        IndexModel("email", unique=True),
+    ]
+
+    @staticmethod
+    def explain_queries(user_id: str) -> Dict[str, dict]:
+        """Representative filter of every query, for the explain() diagnostics"""
+        return {
+            "by_email": {"filter": {"email": "someone@example.com"}, "limit": 1},
+            "by_id": {"filter": {"_id": ObjectId(user_id) if ObjectId.is_valid(user_id) else ObjectId()}, "limit": 1},
+        }
 
     @staticmethod
     async def create_user(user_data: dict) -> UserInDB:
         """Create a new user"""
-        db = get_database()
-        result = await db[UserRepository.collection_name].insert_one(user_data)
+        collection = get_collection(UserRepository.collection_name, UserRepository.db_profile)
+        result = await collection.insert_one(user_data)
         user_data["_id"] = str(result.inserted_id)
         return UserInDB(**user_data)
 
     @staticmethod
     async def get_user_by_email(email: str) -> Optional[UserInDB]:
         """Get user by email"""
-        db = get_database()
-        user = await db[UserRepository.collection_name].find_one({"email": email})
+        collection = get_collection(UserRepository.collection_name, UserRepository.db_profile)
+        user = await collection.find_one({"email": email})
         if user:
             user["_id"] = str(user["_id"])
             return UserInDB(**user)
@@ -29,9 +52,9 @@ class UserRepository:
     @staticmethod
     async def get_user_by_id(user_id: str) -> Optional[UserInDB]:
         """Get user by ID"""
-        db = get_database()
+        collection = get_collection(UserRepository.collection_name, UserRepository.db_profile)
         try:
-            user = await db[UserRepository.collection_name].find_one({"_id": ObjectId(user_id)})
+            user = await collection.find_one({"_id": ObjectId(user_id)})
             if user:
                 user["_id"] = str(user["_id"])
                 return UserInDB(**user)
@@ -39,9 +62,52 @@ class UserRepository:
             pass
         return None
 
+    @staticmethod
+    async def get_cached_user_by_id(user_id: str) -> Optional[UserInDB]:
+        """Get user by ID, serving recent lookups from the principal cache"""
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await UserRepository.get_user_by_id(user_id)
+            if user is not None:
+                user_cache.set(user_id, user)
+        return user
+
+    @staticmethod
+    def invalidate_cached_user(user_id: str):
+        """Drop a user from the principal cache"""
+        user_cache.pop(str(user_id))
+
+    @staticmethod
+    async def set_user_active(user_id: str, is_active: bool) -> bool:
+        """Activate or deactivate a user"""
+        collection = get_collection(UserRepository.collection_name, UserRepository.db_profile)
+        try:
+            result = await collection.update_one(
+                {"_id": ObjectId(user_id)},
+                {"$set": {"is_active": is_active}}
+            )
+        except Exception:
+            return False
+        UserRepository.invalidate_cached_user(user_id)
+        return result.matched_count > 0
+
+    @staticmethod
+    async def update_password(user_id: str, hashed_password: str) -> bool:
+        """Replace a user's password hash"""
+        collection = get_collection(UserRepository.collection_name, UserRepository.db_profile)
+        try:
+            result = await collection.update_one(
+                {"_id": ObjectId(user_id)},
+                {"$set": {"hashed_password": hashed_password}}
+            )
+        except Exception:
+            return False
+        UserRepository.invalidate_cached_user(user_id)
+        return result.matched_count > 0
+
     @staticmethod
     async def user_exists(email: str) -> bool:
         """Check if user exists"""
-        db = get_database()
-        count = await db[UserRepository.collection_name].count_documents({"email": email})
+        collection = get_collection(UserRepository.collection_name, UserRepository.db_profile)
+        count = await collection.count_documents({"email": email})
         return count > 0
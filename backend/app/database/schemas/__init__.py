@@ -1,6 +1,9 @@
 from .user import UserCreate, UserLogin, UserInDB, UserResponse
-from .snippet import SnippetCreate, SnippetUpdate, SnippetInDB, SnippetResponse
-from .chat import ChatMessage, ChatHistoryCreate, ChatHistoryInDB, ChatHistoryResponse
+from .snippet import (
+    SnippetCreate, SnippetImport, SnippetUpdate, SnippetInDB, SnippetResponse, SnippetSummary,
+    SnippetBulkDelete, SnippetBulkUpdate, SnippetBulkUpdateItem, SnippetFilter, SnippetTagUpdate,
+)
+from .chat import ChatMessage, ChatHistoryCreate, ChatHistoryInDB, ChatHistoryResponse, ChatHistorySummary
 
 __all__ = [
     "UserCreate",
@@ -8,11 +11,19 @@ __all__ = [
     "UserInDB",
     "UserResponse",
     "SnippetCreate",
+    "SnippetImport",
     "SnippetUpdate",
     "SnippetInDB",
     "SnippetResponse",
+    "SnippetSummary",
+    "SnippetBulkDelete",
+    "SnippetBulkUpdate",
+    "SnippetBulkUpdateItem",
+    "SnippetFilter",
+    "SnippetTagUpdate",
     "ChatMessage",
     "ChatHistoryCreate",
     "ChatHistoryInDB",
     "ChatHistoryResponse",
+    "ChatHistorySummary",
 ]
@@ -28,6 +28,11 @@ class ChatHistoryInDB(BaseModel):
     messages: list[ChatMessage] = []
     mode: str
     code_context: Optional[str] = None
+    room_id: Optional[str] = None  # set for AI responses generated in a team room
+    message_total: Optional[int] = None  # messages ever added, including ones trimmed from the front
+    summary: Optional[str] = None  # rolling summary of turns older than the prompt window
+    summary_upto_index: Optional[int] = None  # message_total position just past the newest summarized message
+    summary_upto: Optional[datetime] = None  # boundary of summaries written before summary_upto_index
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -39,3 +44,16 @@ class ChatHistoryResponse(BaseModel):
     mode: str
     code_context: Optional[str] = None
     created_at: datetime
+
+
+class ChatHistorySummary(BaseModel):
+    """Lightweight chat entry for list views: messages are replaced by previews"""
+    model_config = ConfigDict(populate_by_name=True)
+    
+    id: Optional[str] = Field(alias="_id", default=None)
+    mode: Optional[str] = None
+    prompt_preview: Optional[str] = None
+    response_preview: Optional[str] = None
+    message_count: int = 0
+    has_code_context: bool = False
+    created_at: datetime
@@ -12,6 +12,12 @@ class SnippetCreate(BaseModel):
     tags: list[str] = []
 
 
+class SnippetImport(SnippetCreate):
+    """One NDJSON import line; timestamps from an export are kept, other fields ignored"""
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class SnippetUpdate(BaseModel):
     title: Optional[str] = None
     code: Optional[str] = None
@@ -20,6 +26,31 @@ class SnippetUpdate(BaseModel):
     tags: Optional[list[str]] = None
 
 
+class SnippetBulkDelete(BaseModel):
+    ids: list[str] = Field(..., min_length=1)
+
+
+class SnippetBulkUpdateItem(SnippetUpdate):
+    id: str
+
+
+class SnippetBulkUpdate(BaseModel):
+    items: list[SnippetBulkUpdateItem] = Field(..., min_length=1)
+
+
+class SnippetFilter(BaseModel):
+    """Selects a user's snippets for bulk operations; an empty filter selects all of them"""
+    ids: Optional[list[str]] = None
+    tags: Optional[list[str]] = None  # snippets with any of these tags
+    language: Optional[str] = None
+
+
+class SnippetTagUpdate(BaseModel):
+    filter: SnippetFilter = SnippetFilter()
+    add: list[str] = []
+    remove: list[str] = []
+
+
 class SnippetInDB(BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
@@ -48,3 +79,18 @@ class SnippetResponse(BaseModel):
     tags: list[str] = []
     created_at: datetime
     updated_at: datetime
+
+
+class SnippetSummary(BaseModel):
+    """Lightweight snippet for list views: code is replaced by a preview"""
+    model_config = ConfigDict(populate_by_name=True)
+    
+    id: Optional[str] = Field(alias="_id", default=None)
+    title: Optional[str] = None
+    language: Optional[str] = None
+    description: Optional[str] = None
+    tags: list[str] = []
+    code_preview: Optional[str] = None
+    code_length: int = 0
+    created_at: datetime
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,205 @@
+import asyncio
+import time
+from typing import List, Optional, Set
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database.connection import get_collection
+from app.utils.metrics import mongo_operation_duration
+
+DUPLICATE_KEY = 11000
+_STOP = object()  # queued by stop() to tell the writer to finish
+
+
+class WriteQueueFullError(Exception):
+    """Raised when the write-behind queue has no room left"""
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue that batches inserts into one collection
+
+    Documents get their ObjectId up front, so callers can hand the id back
+    right away while a background task writes batches with insert_many,
+    flushing on batch size or interval and retrying the documents that
+    failed with exponential backoff. Retries are safe because ids are fixed:
+    documents already written by an earlier attempt fail with a duplicate
+    key, which is ignored.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        profile: str,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int,
+        retry_base_delay: float,
+    ):
+        self.collection_name = collection_name
+        self.profile = profile
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.pending: Set[ObjectId] = set()
+        self._written = asyncio.Condition()
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the background writer"""
+        if self._worker is None:
+            self._stopping = False
+            self._worker = asyncio.create_task(self._write_forever())
+
+    def enqueue(self, doc: dict) -> ObjectId:
+        """Queue a document for insertion; returns its pre-generated id"""
+        if self._worker is None or self._stopping:
+            raise WriteQueueFullError("Write-behind queue is not running")
+        doc.setdefault("_id", ObjectId())
+        try:
+            self.queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            raise WriteQueueFullError("Write-behind queue is full")
+        self.pending.add(doc["_id"])
+        self.enqueued += 1
+        return doc["_id"]
+
+    def is_pending(self, doc_id: ObjectId) -> bool:
+        """Check whether a document is queued but not yet written"""
+        return doc_id in self.pending
+
+    async def wait_written(self, doc_id: ObjectId, timeout: float = 5.0) -> bool:
+        """Wait until a queued document has been written (or given up on)"""
+        async with self._written:
+            try:
+                await asyncio.wait_for(
+                    self._written.wait_for(lambda: doc_id not in self.pending),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def _write_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            doc = await self.queue.get()
+            if doc is _STOP:
+                return
+            batch = [doc]
+            deadline = loop.time() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if doc is _STOP:
+                    stop = True
+                    break
+                batch.append(doc)
+
+            await self._write_batch(batch)
+            if stop:
+                return
+
+    async def _write_batch(self, batch: List[dict]):
+        collection = get_collection(self.collection_name, self.profile)
+        histogram = mongo_operation_duration.labels(f"WriteBehindQueue.{self.collection_name}")
+        remaining = batch
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                await collection.insert_many(remaining, ordered=False)
+                histogram.observe(time.perf_counter() - started)
+                await self._mark_written(remaining)
+                remaining = []
+                break
+            except BulkWriteError as e:
+                # Unordered: every document without a write error got in, and
+                # duplicates mean an earlier attempt got through before failing
+                failed = {
+                    error["index"] for error in e.details.get("writeErrors", [])
+                    if error.get("code") != DUPLICATE_KEY
+                }
+                await self._mark_written([doc for i, doc in enumerate(remaining) if i not in failed])
+                remaining = [remaining[i] for i in sorted(failed)]
+                if not remaining:
+                    break
+                error = e
+            except Exception as e:
+                error = e
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self.retry_base_delay * 2 ** attempt)
+
+        self.batches += 1
+        if remaining:
+            self.failed += len(remaining)
+            print(
+                f"Write-behind insert into {self.collection_name} failed, "
+                f"dropping {len(remaining)} of {len(batch)} documents: {error}"
+            )
+            await self._release(remaining)
+
+    async def _mark_written(self, docs: List[dict]):
+        self.written += len(docs)
+        await self._release(docs)
+
+    async def _release(self, docs: List[dict]):
+        """Stop treating documents as pending and wake anyone waiting on them"""
+        if not docs:
+            return
+        async with self._written:
+            for doc in docs:
+                self.pending.discard(doc["_id"])
+            self._written.notify_all()
+
+    async def stop(self):
+        """Stop accepting writes and flush everything still queued"""
+        if self._worker is None:
+            return
+        self._stopping = True
+        # The writer drains everything queued ahead of the marker, then exits
+        await self.queue.put(_STOP)
+        await self._worker
+        self._worker = None
+        print(f"✅ Flushed {self.collection_name} write-behind queue")
+
+    def stats(self) -> dict:
+        """Queue depth and write counters"""
+        return {
+            "queued": self.queue.qsize(),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed": self.failed
+        }
+
+
+chat_writer = WriteBehindQueue(
+    collection_name="chat_history",
+    profile="fast_write",
+    max_queue=settings.CHAT_WRITE_QUEUE_SIZE,
+    batch_size=settings.CHAT_WRITE_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITE_FLUSH_MS / 1000,
+    max_retries=settings.CHAT_WRITE_MAX_RETRIES,
+    retry_base_delay=settings.CHAT_WRITE_RETRY_BASE_MS / 1000,
+)
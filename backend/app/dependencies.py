@@ -8,6 +8,19 @@ from app.database.schemas import UserInDB
 security = HTTPBearer()
 
 
+async def get_user_from_token(token: str) -> Optional[UserInDB]:
+    """Resolve a JWT to its user, using the token and principal caches"""
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+
+    return await UserRepository.get_cached_user_by_id(user_id)
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInDB:
     """Get current authenticated user from JWT token"""
     token = credentials.credentials
@@ -28,7 +41,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await UserRepository.get_user_by_id(user_id)
+    user = await UserRepository.get_cached_user_by_id(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
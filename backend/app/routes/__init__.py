@@ -2,5 +2,6 @@ from .auth import router as auth_router
 from .snippets import router as snippets_router
 from .ai import router as ai_router
 from .websocket import router as websocket_router
+from .metrics import router as metrics_router
 
-__all__ = ["auth_router", "snippets_router", "ai_router", "websocket_router"]
+__all__ = ["auth_router", "snippets_router", "ai_router", "websocket_router", "metrics_router"]
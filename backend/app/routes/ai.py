@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from pydantic import BaseModel, Field
 from typing import Optional, Literal
 from app.dependencies import get_current_user
 from app.database.schemas.user import UserInDB
 from app.database.repositories import ChatRepository
-from app.utils.openai_helper import generate_code, debug_code, explain_code
+from app.database.pagination import next_cursor, parse_fields
+from app.utils.openai_helper import generate_code, debug_code, explain_code, chat_completion
+from app.utils.conversation import build_conversation, schedule_summary_refresh
+from app.utils.openai_client import ai_client, AIOverloadedError, AITimeoutError
+from app.utils.model_router import model_router, PromptTooLargeError
 from app.utils.rate_limiter import rate_limiter
+from app.utils.response_cache import response_cache
 from app.database.schemas.chat import ChatMessage
+from app.utils.serializers import success_response, chat_document, chat_model
 
 router = APIRouter(prefix="/api/ai", tags=["AI"])
 
@@ -16,6 +22,7 @@ class AIPromptRequest(BaseModel):
     mode: Literal["generate", "debug", "explain"]
     code_context: Optional[str] = None
     language: str = "python"
+    chat_id: Optional[str] = None  # continue an existing chat instead of starting a new one
 
 
 @router.post("/prompt", response_model=dict)
@@ -25,14 +32,17 @@ async def ai_prompt(
 ):
     """Process AI prompt with different modes"""
     # Check rate limit
-    if not rate_limiter.is_allowed(str(current_user.id)):
-        remaining = rate_limiter.get_remaining_requests(str(current_user.id))
+    if not await rate_limiter.is_allowed(str(current_user.id)):
+        remaining = await rate_limiter.get_remaining_requests(str(current_user.id))
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Rate limit exceeded. Remaining requests: {remaining}"
         )
     
     try:
+        if request.chat_id:
+            return await _continue_chat(request, str(current_user.id))
+        
         # Generate AI response based on mode
         if request.mode == "generate":
             ai_response = await generate_code(request.prompt, request.language)
@@ -62,21 +72,35 @@ async def ai_prompt(
             "code_context": request.code_context
         }
         
-        chat_history = await ChatRepository.create_chat_history(chat_data)
+        chat_history = await ChatRepository.queue_chat_history(chat_data)
         
-        remaining = rate_limiter.get_remaining_requests(str(current_user.id))
+        remaining = await rate_limiter.get_remaining_requests(str(current_user.id))
         
-        return {
-            "status": "success",
-            "message": "AI response generated successfully",
-            "data": {
-                "response": ai_response,
-                "chat_id": str(chat_history.id),
-                "mode": request.mode,
-                "remaining_requests": remaining
-            }
-        }
+        return success_response("AI response generated successfully", {
+            "response": ai_response,
+            "chat_id": str(chat_history.id),
+            "mode": request.mode,
+            "remaining_requests": remaining
+        })
         
+    except HTTPException:
+        raise
+    except PromptTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except AIOverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except AITimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -84,36 +108,101 @@ async def ai_prompt(
         )
 
 
+async def _continue_chat(request: AIPromptRequest, user_id: str):
+    """Answer a follow-up prompt within an existing chat"""
+    chat = await ChatRepository.get_chat_history_by_id(request.chat_id, user_id)
+    if not chat:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat history not found"
+        )
+    
+    messages, _ = build_conversation(chat, request.prompt, request.code_context)
+    ai_response = await chat_completion(chat.mode, messages)
+    
+    updated = await ChatRepository.add_message_to_chat(
+        request.chat_id,
+        user_id,
+        ChatMessage(role="user", content=request.prompt),
+        ChatMessage(role="assistant", content=ai_response)
+    )
+    if not updated:
+        # Deleted while the reply was being generated
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat history not found"
+        )
+    schedule_summary_refresh(updated)
+    
+    remaining = await rate_limiter.get_remaining_requests(user_id)
+    
+    return success_response("AI response generated successfully", {
+        "response": ai_response,
+        "chat_id": request.chat_id,
+        "mode": chat.mode,
+        "remaining_requests": remaining
+    })
+
+
 @router.get("/history", response_model=dict)
 async def get_chat_history(
-    skip: int = 0,
-    limit: int = 50,
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: Literal["full", "summary"] = Query("full", description="summary returns message previews instead of full messages"),
+    fields: Optional[str] = Query(None, description="Comma-separated summary fields to return"),
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Get chat history for current user"""
-    chats = await ChatRepository.get_user_chat_history(str(current_user.id), skip, limit)
+    if view == "summary" or fields:
+        try:
+            selected = parse_fields(fields)
+            summaries = await ChatRepository.get_user_chat_summaries(
+                str(current_user.id), skip, limit, cursor, selected
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        include = set(selected) | {"id"} if selected else None
+        return success_response(
+            "Chat history retrieved successfully",
+            [c.model_dump(include=include) for c in summaries],
+            next_cursor=next_cursor(summaries, limit)
+        )
+    
+    # Raw documents go straight to JSON without a model round-trip
+    try:
+        docs = await ChatRepository.get_user_chat_history_documents(str(current_user.id), skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    return {
-        "status": "success",
-        "message": "Chat history retrieved successfully",
-        "data": [
-            {
-                "id": str(chat.id),
-                "messages": [
-                    {
-                        "role": msg.role,
-                        "content": msg.content,
-                        "timestamp": msg.timestamp.isoformat()
-                    }
-                    for msg in chat.messages
-                ],
-                "mode": chat.mode,
-                "code_context": chat.code_context,
-                "created_at": chat.created_at.isoformat()
-            }
-            for chat in chats
-        ]
-    }
+    return success_response(
+        "Chat history retrieved successfully",
+        [chat_document(doc) for doc in docs],
+        next_cursor=next_cursor(docs, limit)
+    )
+
+
+@router.get("/history/{chat_id}", response_model=dict)
+async def get_chat(
+    chat_id: str,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get a single chat history entry with full messages"""
+    chat = await ChatRepository.get_chat_history_by_id(chat_id, str(current_user.id))
+    if not chat:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat history not found"
+        )
+    
+    return success_response("Chat history retrieved successfully", chat_model(chat))
 
 
 @router.delete("/history/{chat_id}", response_model=dict)
@@ -129,24 +218,28 @@ async def delete_chat_history(
             detail="Chat history not found"
         )
     
-    return {
-        "status": "success",
-        "message": "Chat history deleted successfully",
-        "data": None
-    }
+    return success_response("Chat history deleted successfully", None)
 
 
 @router.get("/rate-limit", response_model=dict)
 async def get_rate_limit_status(current_user: UserInDB = Depends(get_current_user)):
     """Get current rate limit status for user"""
-    remaining = rate_limiter.get_remaining_requests(str(current_user.id))
-    
-    return {
-        "status": "success",
-        "message": "Rate limit status retrieved",
-        "data": {
-            "remaining_requests": remaining,
-            "total_requests": 50,
-            "window_minutes": 60
-        }
-    }
+    return success_response("Rate limit status retrieved", await rate_limiter.get_status(str(current_user.id)))
+
+
+@router.get("/cache-stats", response_model=dict)
+async def get_cache_stats(current_user: UserInDB = Depends(get_current_user)):
+    """Get AI response cache hit/miss/eviction counters"""
+    return success_response("Cache statistics retrieved", response_cache.stats())
+
+
+@router.get("/pool-stats", response_model=dict)
+async def get_pool_stats(current_user: UserInDB = Depends(get_current_user)):
+    """Get AI client pool, queue and coalescing counters"""
+    return success_response("Pool statistics retrieved", ai_client.stats())
+
+
+@router.get("/routing-stats", response_model=dict)
+async def get_routing_stats(current_user: UserInDB = Depends(get_current_user)):
+    """Get model tier routing counts, fallbacks and latency per tier and mode"""
+    return success_response("Routing statistics retrieved", model_router.stats())
@@ -2,10 +2,11 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import timedelta
 from app.database.schemas import UserCreate, UserLogin, UserResponse
 from app.database.repositories import UserRepository
-from app.utils.auth import verify_password, get_password_hash, create_access_token
+from app.utils.auth import verify_password_async, get_password_hash_async, create_access_token
 from app.config import settings
 from app.dependencies import get_current_user
 from app.database.schemas.user import UserInDB
+from app.utils.serializers import success_response, user_model
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -21,7 +22,7 @@ async def register(user_data: UserCreate):
         )
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     user_dict = {
         "username": user_data.username,
         "email": user_data.email,
@@ -36,20 +37,11 @@ async def register(user_data: UserCreate):
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     
-    return {
-        "status": "success",
-        "message": "User registered successfully",
-        "data": {
-            "user": {
-                "id": str(user.id),
-                "username": user.username,
-                "email": user.email,
-                "created_at": user.created_at.isoformat()
-            },
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
-    }
+    return success_response("User registered successfully", {
+        "user": user_model(user),
+        "access_token": access_token,
+        "token_type": "bearer"
+    })
 
 
 @router.post("/login", response_model=dict)
@@ -57,7 +49,7 @@ async def login(credentials: UserLogin):
     """Login user"""
     # Get user
     user = await UserRepository.get_user_by_email(credentials.email)
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -76,32 +68,14 @@ async def login(credentials: UserLogin):
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     
-    return {
-        "status": "success",
-        "message": "Login successful",
-        "data": {
-            "user": {
-                "id": str(user.id),
-                "username": user.username,
-                "email": user.email,
-                "created_at": user.created_at.isoformat()
-            },
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
-    }
+    return success_response("Login successful", {
+        "user": user_model(user),
+        "access_token": access_token,
+        "token_type": "bearer"
+    })
 
 
 @router.get("/me", response_model=dict)
 async def get_me(current_user: UserInDB = Depends(get_current_user)):
     """Get current user info"""
-    return {
-        "status": "success",
-        "message": "User retrieved successfully",
-        "data": {
-            "id": str(current_user.id),
-            "username": current_user.username,
-            "email": current_user.email,
-            "created_at": current_user.created_at.isoformat()
-        }
-    }
+    return success_response("User retrieved successfully", user_model(current_user))
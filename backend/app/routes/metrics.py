@@ -0,0 +1,87 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.database.connection import pool_metrics
+from app.database.repositories.blob_repository import BlobRepository, blob_cache
+from app.database.write_behind import chat_writer
+from app.routes.websocket import manager
+from app.config import settings
+from app.utils.metrics import registry
+from app.utils.model_router import model_router
+from app.utils.openai_client import ai_client
+from app.utils.rate_limiter import rate_limiter
+from app.utils.response_cache import response_cache
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Gauges and counters are read from the owning objects only when scraped
+registry.gauge("ws_connections", "Open WebSocket connections on this worker", lambda: len(manager.connections))
+registry.gauge("ws_rooms", "Team rooms with members on this worker", lambda: len(manager.rooms))
+registry.counter(
+    "ws_streams_abandoned_total",
+    "Chat replies stopped before completion, by reason",
+    lambda: {"cancelled": manager.streams_cancelled, "disconnected": manager.streams_disconnected},
+    ("reason",)
+)
+registry.counter("rate_limit_rejections_total", "Requests rejected by the rate limiter", lambda: rate_limiter.rejected)
+registry.gauge("ai_requests_active", "AI requests holding an upstream slot", lambda: ai_client.stats()["active"])
+registry.gauge("ai_requests_waiting", "AI requests waiting for an upstream slot", lambda: ai_client.stats()["waiting"])
+registry.counter("ai_requests_shed_total", "AI requests rejected or timed out waiting for a slot",
+                 lambda: ai_client.rejected + ai_client.timed_out)
+registry.counter("ai_requests_coalesced_total", "AI requests served by an identical in-flight call",
+                 lambda: ai_client.coalesced)
+registry.counter("ai_fallbacks_total", "AI requests retried on another model tier", lambda: model_router.fallbacks)
+registry.counter("ai_timeouts_total", "AI attempts that missed a deadline", lambda: model_router.timeouts)
+registry.counter("ai_streams_abandoned_total", "AI streams closed before completion",
+                 lambda: model_router.abandoned)
+registry.counter(
+    "ai_cache_requests_total",
+    "AI response cache lookups by tier and result",
+    lambda: {
+        ("local", "hit"): response_cache.local.hits,
+        ("local", "miss"): response_cache.local.misses,
+        ("shared", "hit"): response_cache.shared_hits,
+        ("shared", "miss"): response_cache.shared_misses,
+    },
+    ("tier", "result")
+)
+registry.counter(
+    "code_blob_cache_requests_total",
+    "Code blob cache lookups by result",
+    lambda: {"hit": blob_cache.hits, "miss": blob_cache.misses},
+    ("result",)
+)
+registry.counter("code_blob_missing_total", "Code blob references that pointed at no blob",
+                 lambda: BlobRepository.missing)
+registry.gauge("chat_write_queue_depth", "Chat inserts waiting in the write-behind queue",
+               lambda: chat_writer.queue.qsize())
+registry.counter("chat_write_failures_total", "Chat inserts dropped after exhausting retries",
+                 lambda: chat_writer.failed)
+registry.gauge(
+    "mongo_pool_connections",
+    "MongoDB connections by state",
+    lambda: {"open": pool_metrics.open, "in_use": pool_metrics.in_use},
+    ("state",)
+)
+registry.gauge("mongo_pool_waiting", "Operations waiting for a MongoDB connection", lambda: pool_metrics.waiting)
+registry.gauge("mongo_pool_saturation", "Checked-out MongoDB connections as a share of maxPoolSize",
+               lambda: pool_metrics.in_use / max(1, settings.MONGO_MAX_POOL_SIZE))
+registry.counter("mongo_pool_checkouts_total", "MongoDB connections checked out of the pool",
+                 lambda: pool_metrics.checkouts)
+registry.counter("mongo_pool_checkout_wait_seconds_total", "Time spent waiting for pooled MongoDB connections",
+                 lambda: pool_metrics.checkout_wait_seconds)
+registry.counter(
+    "mongo_pool_checkout_failures_total",
+    "MongoDB connection check-outs that failed, by reason",
+    lambda: dict(pool_metrics.checkout_failures),
+    ("reason",)
+)
+registry.counter("mongo_pool_clears_total", "MongoDB pools cleared after connection errors",
+                 lambda: pool_metrics.pool_clears)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
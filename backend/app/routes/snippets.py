@@ -1,9 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Optional
-from app.database.schemas import SnippetCreate, SnippetUpdate, SnippetResponse
+import asyncio
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Literal, Tuple
+from pydantic import ValidationError
+from pymongo.errors import PyMongoError
+from app.config import settings
+from app.database.schemas import (
+    SnippetCreate, SnippetImport, SnippetUpdate, SnippetResponse,
+    SnippetBulkDelete, SnippetBulkUpdate, SnippetTagUpdate,
+)
 from app.database.repositories import SnippetRepository
+from app.database.repositories.blob_repository import MissingBlobError
 from app.dependencies import get_current_user
+from app.database.pagination import next_cursor, next_offset_cursor, parse_fields
 from app.database.schemas.user import UserInDB
+from app.utils.json_codec import LineTooLongError, dumps_bytes, iter_ndjson_lines, loads
+from app.utils.serializers import success_response, snippet_document, snippet_model
 
 router = APIRouter(prefix="/api/snippets", tags=["Snippets"])
 
@@ -19,52 +32,254 @@ async def create_snippet(
     
     snippet = await SnippetRepository.create_snippet(snippet_dict)
     
-    return {
-        "status": "success",
-        "message": "Snippet created successfully",
-        "data": {
-            "id": str(snippet.id),
-            "title": snippet.title,
-            "code": snippet.code,
-            "language": snippet.language,
-            "description": snippet.description,
-            "tags": snippet.tags,
-            "created_at": snippet.created_at.isoformat(),
-            "updated_at": snippet.updated_at.isoformat()
-        }
-    }
+    return success_response("Snippet created successfully", snippet_model(snippet))
 
 
 @router.get("", response_model=dict)
 async def get_snippets(
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: Literal["full", "summary"] = Query("full", description="summary returns code previews instead of full code"),
+    fields: Optional[str] = Query(None, description="Comma-separated summary fields to return"),
+    match: Literal["text", "substring"] = Query("text", description="Search by words (text index) or substrings"),
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Get all snippets for current user"""
-    if search:
-        snippets = await SnippetRepository.search_snippets(str(current_user.id), search, skip, limit)
-    else:
-        snippets = await SnippetRepository.get_user_snippets(str(current_user.id), skip, limit)
+    def page_cursor(items: list) -> Optional[str]:
+        # Search results are ranked by relevance, so they page by offset
+        if search:
+            return next_offset_cursor(items, limit, skip, cursor)
+        return next_cursor(items, limit)
+    
+    if view == "summary" or fields:
+        try:
+            selected = parse_fields(fields)
+            summaries = await SnippetRepository.get_user_snippet_summaries(
+                str(current_user.id), skip, limit, cursor, search, selected, match
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        include = set(selected) | {"id"} if selected else None
+        return success_response(
+            "Snippets retrieved successfully",
+            [s.model_dump(include=include) for s in summaries],
+            next_cursor=page_cursor(summaries)
+        )
+    
+    # Raw documents go straight to JSON without a model round-trip
+    try:
+        if search:
+            docs = await SnippetRepository.search_snippet_documents(str(current_user.id), search, skip, limit, cursor, match)
+        else:
+            docs = await SnippetRepository.get_user_snippet_documents(str(current_user.id), skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    return {
-        "status": "success",
-        "message": "Snippets retrieved successfully",
-        "data": [
-            {
-                "id": str(s.id),
-                "title": s.title,
-                "code": s.code,
-                "language": s.language,
-                "description": s.description,
-                "tags": s.tags,
-                "created_at": s.created_at.isoformat(),
-                "updated_at": s.updated_at.isoformat()
-            }
-            for s in snippets
-        ]
-    }
+    return success_response(
+        "Snippets retrieved successfully",
+        [snippet_document(doc) for doc in docs],
+        next_cursor=page_cursor(docs)
+    )
+
+
+def _import_error_message(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc']) or 'line'}: {e['msg']}" for e in error.errors()
+        )
+    return "Invalid JSON"
+
+
+@router.post("/import", response_model=dict)
+async def import_snippets(
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Import snippets from an NDJSON body, one snippet object per line
+
+    Lines are validated and inserted in unordered batches while the body is
+    still streaming in; invalid lines are reported and skipped.
+    """
+    user_id = str(current_user.id)
+    seen = 0
+    imported = 0
+    failed = 0
+    errors: List[dict] = []
+    batch: List[Tuple[int, dict]] = []
+    pending: Optional[asyncio.Task] = None
+
+    def report(line_no: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.SNIPPET_IMPORT_MAX_ERRORS:
+            errors.append({"line": line_no, "error": message})
+
+    async def write(lines: List[Tuple[int, dict]]):
+        nonlocal imported
+        try:
+            write_errors = await SnippetRepository.insert_snippets(user_id, [doc for _, doc in lines])
+        except PyMongoError:
+            write_errors = {i: "Database write failed" for i in range(len(lines))}
+        imported += len(lines) - len(write_errors)
+        for i, message in sorted(write_errors.items()):
+            report(lines[i][0], message)
+
+    async def flush():
+        # One insert in flight while the next batch is parsed
+        nonlocal batch, pending
+        if pending is not None:
+            await pending
+        pending = asyncio.create_task(write(batch))
+        batch = []
+
+    truncated = False
+    try:
+        async for line_no, line in iter_ndjson_lines(request.stream(), settings.SNIPPET_IMPORT_MAX_LINE_BYTES):
+            if seen >= settings.SNIPPET_IMPORT_MAX_LINES:
+                truncated = True
+                break
+            seen += 1
+            if isinstance(line, LineTooLongError):
+                report(line_no, str(line))
+                continue
+            try:
+                snippet = SnippetImport.model_validate(loads(line))
+            except ValueError as e:
+                # JSON and validation errors alike
+                report(line_no, _import_error_message(e))
+                continue
+            batch.append((line_no, snippet.model_dump(exclude_none=True)))
+            if len(batch) >= settings.SNIPPET_IMPORT_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+    finally:
+        if pending is not None:
+            await pending
+
+    message = f"Imported {imported} snippets"
+    if truncated:
+        message += f" (stopped at the {settings.SNIPPET_IMPORT_MAX_LINES} line limit)"
+    return success_response(message, {"imported": imported, "failed": failed, "errors": errors})
+
+
+@router.get("/export")
+async def export_snippets(current_user: UserInDB = Depends(get_current_user)):
+    """Export all snippets as NDJSON, streamed from the database cursor"""
+    batches = SnippetRepository.iter_user_snippet_documents(
+        str(current_user.id), settings.SNIPPET_EXPORT_BATCH_SIZE
+    )
+
+    async def lines():
+        try:
+            async for docs in batches:
+                yield b"".join(dumps_bytes(snippet_document(doc)) + b"\n" for doc in docs)
+        except (MissingBlobError, PyMongoError) as e:
+            # The 200 is already sent; a last error line marks the export as partial
+            print(f"Snippet export for user {current_user.id} stopped: {e}")
+            message = "Stored code for a snippet is missing" if isinstance(e, MissingBlobError) else "Database read failed"
+            yield dumps_bytes({"error": f"{message}; export is incomplete"}) + b"\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="snippets.ndjson"'}
+    )
+
+
+def _check_bulk_size(count: int):
+    if count > settings.SNIPPET_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.SNIPPET_BULK_MAX_ITEMS} snippets per request"
+        )
+
+
+@router.post("/bulk/delete", response_model=dict)
+async def bulk_delete_snippets(
+    request: SnippetBulkDelete,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Delete many snippets in one request, with a result per id"""
+    _check_bulk_size(len(request.ids))
+    results = await SnippetRepository.bulk_delete_snippets(str(current_user.id), request.ids)
+    deleted = sum(1 for result in results.values() if result == "deleted")
+    return success_response(
+        f"Deleted {deleted} snippets",
+        {
+            "deleted": deleted,
+            "results": [{"id": snippet_id, "status": results[snippet_id]} for snippet_id in dict.fromkeys(request.ids)]
+        }
+    )
+
+
+@router.post("/bulk/update", response_model=dict)
+async def bulk_update_snippets(
+    request: SnippetBulkUpdate,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Update fields of many snippets in one request, with a result per id"""
+    _check_bulk_size(len(request.items))
+    updates = []
+    results = {}
+    for item in request.items:
+        fields = item.model_dump(exclude={"id"}, exclude_none=True)
+        if not ObjectId.is_valid(item.id):
+            results[item.id] = "invalid_id"
+        elif fields:
+            updates.append((item.id, fields))
+        else:
+            results.setdefault(item.id, "no_changes")
+    if updates:
+        # An id with any fields to set gets the repository's status
+        results.update(await SnippetRepository.bulk_update_snippets(str(current_user.id), updates))
+    updated = sum(1 for result in results.values() if result == "updated")
+    return success_response(
+        f"Updated {updated} snippets",
+        {
+            "updated": updated,
+            "results": [
+                {"id": snippet_id, "status": results[snippet_id]}
+                for snippet_id in dict.fromkeys(item.id for item in request.items)
+            ]
+        }
+    )
+
+
+@router.post("/bulk/tags", response_model=dict)
+async def bulk_update_tags(
+    request: SnippetTagUpdate,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Add and remove tags on every snippet matching a filter"""
+    if not request.add and not request.remove:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give tags to add or remove"
+        )
+    if request.filter.ids is not None:
+        _check_bulk_size(len(request.filter.ids))
+    result = await SnippetRepository.update_snippet_tags(
+        str(current_user.id),
+        request.add,
+        request.remove,
+        request.filter.ids,
+        request.filter.tags,
+        request.filter.language
+    )
+    message = f"Updated tags on {result['matched']} matching snippets"
+    if result["errors"]:
+        message = f"Tag update stopped by a write error after matching {result['matched']} snippets"
+    return success_response(message, result)
 
 
 @router.get("/{snippet_id}", response_model=dict)
@@ -80,20 +295,7 @@ async def get_snippet(
             detail="Snippet not found"
         )
     
-    return {
-        "status": "success",
-        "message": "Snippet retrieved successfully",
-        "data": {
-            "id": str(snippet.id),
-            "title": snippet.title,
-            "code": snippet.code,
-            "language": snippet.language,
-            "description": snippet.description,
-            "tags": snippet.tags,
-            "created_at": snippet.created_at.isoformat(),
-            "updated_at": snippet.updated_at.isoformat()
-        }
-    }
+    return success_response("Snippet retrieved successfully", snippet_model(snippet))
 
 
 @router.put("/{snippet_id}", response_model=dict)
@@ -112,20 +314,7 @@ async def update_snippet(
             detail="Snippet not found"
         )
     
-    return {
-        "status": "success",
-        "message": "Snippet updated successfully",
-        "data": {
-            "id": str(snippet.id),
-            "title": snippet.title,
-            "code": snippet.code,
-            "language": snippet.language,
-            "description": snippet.description,
-            "tags": snippet.tags,
-            "created_at": snippet.created_at.isoformat(),
-            "updated_at": snippet.updated_at.isoformat()
-        }
-    }
+    return success_response("Snippet updated successfully", snippet_model(snippet))
 
 
 @router.delete("/{snippet_id}", response_model=dict)
@@ -141,8 +330,4 @@ async def delete_snippet(
             detail="Snippet not found"
         )
     
-    return {
-        "status": "success",
-        "message": "Snippet deleted successfully",
-        "data": None
-    }
+    return success_response("Snippet deleted successfully", None)
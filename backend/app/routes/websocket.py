@@ -1,202 +1,519 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
-from typing import Dict, Set, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Depends, status
+from typing import Dict, Set, Optional, Literal, Union
+import asyncio
 import json
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
-from app.utils.auth import decode_access_token
-from app.utils.openai_helper import stream_ai_response
+from app.dependencies import get_current_user, get_user_from_token
+from app.database.schemas.user import UserInDB
+from app.utils.openai_helper import stream_ai_response, stream_chat_completion
+from app.utils.conversation import build_conversation, schedule_summary_refresh
+from app.utils.openai_client import AIOverloadedError, AITimeoutError
+from app.utils.model_router import PromptTooLargeError
+from app.utils.stream_batcher import batch_stream
+from app.utils.json_codec import dumps
+from app.utils.ws_connection import ClientConnection
+from app.utils.serializers import success_response
+from app.utils.pubsub import RoomBackplane, create_backplane
+from app.config import settings
 from app.utils.rate_limiter import rate_limiter
-from app.database.repositories import UserRepository, ChatRepository
+from app.database.repositories import ChatRepository
+from app.database.repositories.blob_repository import MissingBlobError
 from app.database.schemas.chat import ChatMessage
 
 router = APIRouter(tags=["WebSocket"])
 
 
 class ConnectionManager:
-    """Manage WebSocket connections"""
+    """Manage WebSocket connections
+
+    Every socket gets its own connection record, so a user can hold several
+    sockets (tabs, chat and team) at once. Reverse indexes (user -> connections,
+    room -> connections, connection -> rooms) keep connect, join, leave and
+    disconnect constant-time. Room broadcasts go through the configured
+    backplane so they also reach members connected to other workers.
+    """
+    
+    def __init__(self, backplane: RoomBackplane):
+        self.connections: Dict[int, ClientConnection] = {}
+        self.user_connections: Dict[str, Set[ClientConnection]] = {}
+        self.rooms: Dict[str, Set[ClientConnection]] = {}
+        self.backplane = backplane
+        self.active_streams = 0
+        self.draining = False  # set on shutdown: finish current streams, accept no new prompts
+        self._streams_idle = asyncio.Event()
+        self._streams_idle.set()
+        self.streams_cancelled = 0  # replies stopped by a cancel message
+        self.streams_disconnected = 0  # replies abandoned because the socket went away
+    
+    async def start(self):
+        """Start the room backplane"""
+        await self.backplane.start(self._deliver_local)
     
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.rooms: Dict[str, Set[str]] = {}  # room_id -> set of user_ids
+    async def stop(self):
+        """Stop the room backplane"""
+        await self.backplane.stop()
     
-    async def connect(self, websocket: WebSocket, user_id: str):
-        """Connect a user"""
+    async def connect(self, websocket: WebSocket, user_id: str) -> ClientConnection:
+        """Accept and register a socket"""
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        connection = ClientConnection(
+            websocket,
+            user_id,
+            max_queue=settings.WS_SEND_QUEUE_SIZE,
+            policy=settings.WS_SLOW_CONSUMER_POLICY
+        )
+        connection.start()
+        self.connections[connection.id] = connection
+        self.user_connections.setdefault(user_id, set()).add(connection)
+        return connection
     
-    def disconnect(self, user_id: str):
-        """Disconnect a user"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
+    async def disconnect(self, connection: ClientConnection):
+        """Unregister a socket and remove it from its rooms"""
+        if self.connections.pop(connection.id, None) is None:
+            return
+        
+        user_connections = self.user_connections.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.discard(connection)
+            if not user_connections:
+                del self.user_connections[connection.user_id]
         
-        # Remove from all rooms
-        for room_users in self.rooms.values():
-            room_users.discard(user_id)
+        for room_id in list(connection.rooms):
+            try:
+                await self.leave_room(room_id, connection)
+            except Exception as e:
+                # Local membership is already gone; keep cleaning up the rest
+                print(f"Failed to leave room {room_id}: {e}")
+        await connection.close()
     
-    async def send_personal_message(self, message: str, user_id: str):
-        """Send message to specific user"""
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_text(message)
+    async def send_personal_message(self, message: Union[str, dict], user_id: str):
+        """Send message to every socket of a specific user"""
+        if not isinstance(message, str):
+            message = dumps(message)
+        for connection in self.user_connections.get(user_id, ()):
+            connection.send(message)
     
-    def join_room(self, room_id: str, user_id: str):
-        """Add user to a room"""
-        if room_id not in self.rooms:
-            self.rooms[room_id] = set()
-        self.rooms[room_id].add(user_id)
+    async def join_room(self, room_id: str, connection: ClientConnection):
+        """Add a socket to a room"""
+        if room_id in connection.rooms:
+            return
+        connection.rooms.add(room_id)
+        self.rooms.setdefault(room_id, set()).add(connection)
+        await self.backplane.join(room_id, connection.user_id)
     
-    def leave_room(self, room_id: str, user_id: str):
-        """Remove user from a room"""
-        if room_id in self.rooms:
-            self.rooms[room_id].discard(user_id)
-            if not self.rooms[room_id]:
+    async def leave_room(self, room_id: str, connection: ClientConnection):
+        """Remove a socket from a room"""
+        if room_id not in connection.rooms:
+            return
+        connection.rooms.discard(room_id)
+        members = self.rooms.get(room_id)
+        if members is not None:
+            members.discard(connection)
+            if not members:
                 del self.rooms[room_id]
+        await self.backplane.leave(room_id, connection.user_id)
+    
+    async def get_room_members(self, room_id: str) -> Set[str]:
+        """Get the user ids in a room across all workers"""
+        return await self.backplane.members(room_id)
+    
+    async def broadcast_to_room(self, room_id: str, message: Union[str, dict], exclude_user: Optional[str] = None):
+        """Broadcast message to all users in a room
+
+        The message is encoded once and queued on each member's connection,
+        so a slow member never delays the others.
+        """
+        if not isinstance(message, str):
+            message = dumps(message)
+        await self.backplane.publish(room_id, message, exclude_user)
+    
+    def _deliver_local(self, room_id: str, message: str, exclude_user: Optional[str] = None):
+        """Queue an encoded broadcast on this worker's members of a room"""
+        for connection in self.rooms.get(room_id, ()):
+            if connection.user_id != exclude_user:
+                connection.send(message)
+    
+    @asynccontextmanager
+    async def streaming(self):
+        """Mark an AI reply as in flight so shutdown can wait for it"""
+        self.active_streams += 1
+        self._streams_idle.clear()
+        try:
+            yield
+        finally:
+            self.active_streams -= 1
+            if self.active_streams == 0:
+                self._streams_idle.set()
+    
+    async def drain(self, timeout: float):
+        """Stop taking prompts and wait up to `timeout` seconds for in-flight replies"""
+        self.draining = True
+        if self.active_streams:
+            print(f"Draining {self.active_streams} AI streams before shutdown")
+            try:
+                await asyncio.wait_for(self._streams_idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                print(f"Shutting down with {self.active_streams} AI streams unfinished")
+    
+    def stats(self) -> dict:
+        """Get connection and room counts for this worker"""
+        return {
+            "connections": len(self.connections),
+            "users": len(self.user_connections),
+            "rooms": len(self.rooms),
+            "room_memberships": sum(len(members) for members in self.rooms.values()),
+            "dropped_messages": sum(connection.dropped for connection in self.connections.values()),
+            "active_streams": self.active_streams,
+            "streams_cancelled": self.streams_cancelled,
+            "streams_disconnected": self.streams_disconnected,
+        }
+
+
+manager = ConnectionManager(create_backplane(settings.ROOM_BACKPLANE))
+
+SHUTTING_DOWN_MESSAGE = "Server is restarting, please reconnect"
+
+
+def _stream_error(error: Exception) -> dict:
+    """Error frame for a failed AI reply, with the status the REST endpoint would return"""
+    if isinstance(error, PromptTooLargeError):
+        return {"type": "error", "code": 413, "message": str(error)}
+    if isinstance(error, AIOverloadedError):
+        return {"type": "error", "code": 503, "message": str(error)}
+    if isinstance(error, AITimeoutError):
+        return {"type": "error", "code": 504, "message": str(error)}
+    return {"type": "error", "code": 500, "message": f"Error generating response: {str(error)}"}
+
+
+def _chunk_frame(content: str, compact: bool) -> str:
+    """Encode a streamed chunk frame"""
+    if compact:
+        return dumps({"t": "c", "c": content})
+    return dumps({"type": "chunk", "content": content})
+
+
+async def _stream_chat_reply(websocket: WebSocket, user_id: str, message_data: dict, compact: bool):
+    """Answer one /ws/chat prompt: stream the reply, then save it to chat history"""
+    prompt = message_data.get("prompt")
+    mode = message_data.get("mode", "generate")
+    code_context = message_data.get("code_context")
+    chat_id = message_data.get("chat_id")
     
-    async def broadcast_to_room(self, room_id: str, message: str, exclude_user: Optional[str] = None):
-        """Broadcast message to all users in a room"""
-        if room_id in self.rooms:
-            for user_id in self.rooms[room_id]:
-                if user_id != exclude_user and user_id in self.active_connections:
-                    await self.active_connections[user_id].send_text(message)
+    parts = []
+    try:
+        if not prompt:
+            await websocket.send_json({
+                "type": "error",
+                "message": "Prompt is required"
+            })
+            return
+        
+        if manager.draining:
+            await websocket.send_json({
+                "type": "error",
+                "message": SHUTTING_DOWN_MESSAGE
+            })
+            return
+        
+        # Check rate limit
+        if not await rate_limiter.is_allowed(user_id):
+            remaining = await rate_limiter.get_remaining_requests(user_id)
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Rate limit exceeded. Remaining: {remaining}"
+            })
+            return
+        
+        # Follow-ups stream from a budgeted conversation instead of a fresh prompt
+        chat = None
+        if chat_id:
+            try:
+                chat = await ChatRepository.get_chat_history_by_id(chat_id, user_id)
+            except MissingBlobError:
+                await websocket.send_json({
+                    "type": "error",
+                    "code": 500,
+                    "message": "Stored code for this chat is missing"
+                })
+                return
+            if not chat:
+                await websocket.send_json({
+                    "type": "error",
+                    "message": "Chat history not found"
+                })
+                return
+            messages, _ = build_conversation(chat, prompt, code_context)
+            source = stream_chat_completion(chat.mode, messages)
+        else:
+            source = stream_ai_response(prompt, mode, code_context)
+        
+        # Send start signal
+        await websocket.send_json({
+            "type": "start",
+            "message": "Generating response..."
+        })
+        
+        # Stream AI response
+        async with aclosing(batch_stream(
+            source,
+            settings.WS_BATCH_MAX_DELAY_MS / 1000,
+            settings.WS_BATCH_MAX_CHARS
+        )) as frames:
+            async for frame in frames:
+                parts.append(frame)
+                await websocket.send_text(_chunk_frame(frame, compact))
+        full_response = "".join(parts)
+        
+        # Send completion signal
+        await websocket.send_json({
+            "type": "complete",
+            "message": "Response complete"
+        })
+        
+        # Save to chat history
+        if chat:
+            updated = await ChatRepository.add_message_to_chat(
+                chat_id,
+                user_id,
+                ChatMessage(role="user", content=prompt),
+                ChatMessage(role="assistant", content=full_response)
+            )
+            if not updated:
+                # Deleted while the reply was streaming
+                await websocket.send_json({
+                    "type": "error",
+                    "code": 404,
+                    "message": "Chat history not found"
+                })
+                return
+            schedule_summary_refresh(updated)
+            await websocket.send_json({
+                "type": "chat_saved",
+                "chat_id": chat_id
+            })
+            return
+        
+        chat_data = {
+            "user_id": user_id,
+            "messages": [
+                ChatMessage(role="user", content=prompt).dict(),
+                ChatMessage(role="assistant", content=full_response).dict()
+            ],
+            "mode": mode,
+            "code_context": code_context
+        }
+        
+        chat_history = await ChatRepository.queue_chat_history(chat_data)
+        
+        # Send chat ID
+        await websocket.send_json({
+            "type": "chat_saved",
+            "chat_id": str(chat_history.id)
+        })
+        
+    except asyncio.CancelledError:
+        # Cancelled by the client or by a disconnect; the upstream stream is already closed
+        try:
+            await websocket.send_json({
+                "type": "cancelled",
+                "message": "Response cancelled"
+            })
+        except Exception:
+            pass
+        raise
+    except Exception as e:
+        # The socket may be the thing that failed; the reply task must not die with an unread error
+        try:
+            await websocket.send_json(_stream_error(e))
+        except Exception:
+            pass
 
 
-manager = ConnectionManager()
+async def _stream_chat_reply_tracked(websocket: WebSocket, user_id: str, message_data: dict, compact: bool):
+    async with manager.streaming():
+        await _stream_chat_reply(websocket, user_id, message_data, compact)
 
 
 @router.websocket("/ws/chat")
-async def websocket_chat(websocket: WebSocket, token: str = Query(...)):
-    """WebSocket endpoint for streaming AI chat responses"""
+async def websocket_chat(
+    websocket: WebSocket,
+    token: str = Query(...),
+    frames: Literal["json", "compact"] = Query("json")
+):
+    """WebSocket endpoint for streaming AI chat responses
+
+    Chunks are batched into frames every WS_BATCH_MAX_DELAY_MS or
+    WS_BATCH_MAX_CHARS. Connect with `frames=compact` to receive chunk
+    frames as `{"t": "c", "c": "..."}` instead of `{"type": "chunk", ...}`.
+    Send `{"type": "cancel"}` to stop the response being streamed; one
+    response streams at a time per socket.
+    """
     # Authenticate user
-    payload = decode_access_token(token)
-    if not payload:
+    user = await get_user_from_token(token)
+    if not user or not user.is_active:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
     
-    user_id = payload.get("sub")
-    if not user_id:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
-    
-    user = await UserRepository.get_user_by_id(user_id)
-    if not user:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+    user_id = str(user.id)
+    compact = frames == "compact"
     
-    await manager.connect(websocket, user_id)
+    connection = await manager.connect(websocket, user_id)
     
+    # The reply streams in its own task so cancel messages and disconnects are seen mid-stream
+    reply: Optional[asyncio.Task] = None
     try:
         while True:
             # Receive message from client
             data = await websocket.receive_text()
             message_data = json.loads(data)
             
-            prompt = message_data.get("prompt")
-            mode = message_data.get("mode", "generate")
-            code_context = message_data.get("code_context")
-            
-            if not prompt:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Prompt is required"
-                })
+            if message_data.get("type") == "cancel":
+                if reply is not None and not reply.done():
+                    reply.cancel()
+                    manager.streams_cancelled += 1
                 continue
             
-            # Check rate limit
-            if not rate_limiter.is_allowed(user_id):
-                remaining = rate_limiter.get_remaining_requests(user_id)
+            if reply is not None and not reply.done():
                 await websocket.send_json({
                     "type": "error",
-                    "message": f"Rate limit exceeded. Remaining: {remaining}"
+                    "message": "A response is already streaming; send cancel first"
                 })
                 continue
             
-            # Send start signal
-            await websocket.send_json({
-                "type": "start",
-                "message": "Generating response..."
-            })
-            
-            # Stream AI response
-            full_response = ""
-            try:
-                async for chunk in stream_ai_response(prompt, mode, code_context):
-                    full_response += chunk
-                    await websocket.send_json({
-                        "type": "chunk",
-                        "content": chunk
-                    })
-                
-                # Send completion signal
-                await websocket.send_json({
-                    "type": "complete",
-                    "message": "Response complete"
-                })
-                
-                # Save to chat history
-                chat_data = {
-                    "user_id": user_id,
-                    "messages": [
-                        ChatMessage(role="user", content=prompt).dict(),
-                        ChatMessage(role="assistant", content=full_response).dict()
-                    ],
-                    "mode": mode,
-                    "code_context": code_context
-                }
-                
-                chat_history = await ChatRepository.create_chat_history(chat_data)
-                
-                # Send chat ID
-                await websocket.send_json({
-                    "type": "chat_saved",
-                    "chat_id": str(chat_history.id)
-                })
-                
-            except Exception as e:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": f"Error generating response: {str(e)}"
-                })
+            reply = asyncio.create_task(_stream_chat_reply_tracked(websocket, user_id, message_data, compact))
     
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(user_id)
+    finally:
+        # Abort any reply still streaming so its upstream request and slot are freed now
+        if reply is not None and not reply.done():
+            reply.cancel()
+            manager.streams_disconnected += 1
+            try:
+                await reply
+            except BaseException:
+                pass
+        await manager.disconnect(connection)
 
 
-@router.websocket("/ws/team/{room_id}")
-async def websocket_team(websocket: WebSocket, room_id: str, token: str = Query(...)):
-    """WebSocket endpoint for team collaboration"""
-    # Authenticate user
-    payload = decode_access_token(token)
-    if not payload:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+async def _stream_team_reply(
+    room_id: str,
+    connection: ClientConnection,
+    user: UserInDB,
+    prompt: str,
+    mode: str,
+    code_context: Optional[str]
+):
+    """Stream one team-room AI reply to every member, then save it to the prompter's history
+
+    The room always gets a terminal event: `ai_complete`, or `ai_error` if the
+    reply failed or was cut short. The prompter also gets the same error frame
+    as on /ws/chat.
+    """
+    user_id = str(user.id)
     
-    user_id = payload.get("sub")
-    if not user_id:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
+    # Broadcast that AI is responding
+    await manager.broadcast_to_room(
+        room_id,
+        {
+            "type": "ai_start",
+            "user_id": user_id,
+            "username": user.username,
+            "prompt": prompt
+        }
+    )
     
-    user = await UserRepository.get_user_by_id(user_id)
-    if not user:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+    # Stream AI response to all room members, encoding each frame once
+    parts = []
+    try:
+        async with manager.streaming():
+            async with aclosing(batch_stream(
+                stream_ai_response(prompt, mode, code_context),
+                settings.WS_BATCH_MAX_DELAY_MS / 1000,
+                settings.WS_BATCH_MAX_CHARS
+            )) as frames:
+                async for frame in frames:
+                    parts.append(frame)
+                    await manager.broadcast_to_room(
+                        room_id,
+                        {
+                            "type": "ai_chunk",
+                            "content": frame,
+                            "user_id": user_id
+                        }
+                    )
+        
+        full_response = "".join(parts)
+        chat_history = await ChatRepository.queue_chat_history({
+            "user_id": user_id,
+            "messages": [
+                ChatMessage(role="user", content=prompt).dict(),
+                ChatMessage(role="assistant", content=full_response).dict()
+            ],
+            "mode": mode,
+            "code_context": code_context,
+            "room_id": room_id
+        })
+    except asyncio.CancelledError:
+        # Server shutdown: members shouldn't wait for a reply that won't come
+        try:
+            await manager.broadcast_to_room(
+                room_id,
+                {"type": "ai_error", "user_id": user_id, "code": 503, "message": SHUTTING_DOWN_MESSAGE}
+            )
+        except Exception:
+            pass
+        raise
+    except Exception as e:
+        error = _stream_error(e)
+        connection.send(dumps(error))
+        await manager.broadcast_to_room(
+            room_id,
+            {"type": "ai_error", "user_id": user_id, "code": error["code"], "message": error["message"]}
+        )
         return
     
-    await manager.connect(websocket, user_id)
-    manager.join_room(room_id, user_id)
-    
-    # Notify room that user joined
     await manager.broadcast_to_room(
         room_id,
-        json.dumps({
-            "type": "user_joined",
+        {
+            "type": "ai_complete",
             "user_id": user_id,
-            "username": user.username,
-            "timestamp": datetime.utcnow().isoformat()
-        }),
-        exclude_user=user_id
+            "full_response": full_response,
+            "chat_id": str(chat_history.id)
+        }
     )
+
+
+@router.websocket("/ws/team/{room_id}")
+async def websocket_team(websocket: WebSocket, room_id: str, token: str = Query(...)):
+    """WebSocket endpoint for team collaboration"""
+    # Authenticate user
+    user = await get_user_from_token(token)
+    if not user or not user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    user_id = str(user.id)
     
+    connection = await manager.connect(websocket, user_id)
     try:
+        await manager.join_room(room_id, connection)
+        
+        # Notify room that user joined
+        await manager.broadcast_to_room(
+            room_id,
+            {
+                "type": "user_joined",
+                "user_id": user_id,
+                "username": user.username,
+                "timestamp": datetime.utcnow().isoformat()
+            },
+            exclude_user=user_id
+        )
+        
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
@@ -212,76 +529,60 @@ async def websocket_team(websocket: WebSocket, room_id: str, token: str = Query(
                 if not prompt:
                     continue
                 
+                if manager.draining:
+                    connection.send(dumps({
+                        "type": "error",
+                        "message": SHUTTING_DOWN_MESSAGE
+                    }))
+                    continue
+                
                 # Check rate limit
-                if not rate_limiter.is_allowed(user_id):
-                    await websocket.send_json({
+                if not await rate_limiter.is_allowed(user_id):
+                    connection.send(dumps({
                         "type": "error",
                         "message": "Rate limit exceeded"
-                    })
+                    }))
                     continue
                 
-                # Broadcast that AI is responding
-                await manager.broadcast_to_room(
-                    room_id,
-                    json.dumps({
-                        "type": "ai_start",
-                        "user_id": user_id,
-                        "username": user.username,
-                        "prompt": prompt
-                    })
-                )
-                
-                # Stream AI response to all room members
-                full_response = ""
-                async for chunk in stream_ai_response(prompt, mode, code_context):
-                    full_response += chunk
-                    await manager.broadcast_to_room(
-                        room_id,
-                        json.dumps({
-                            "type": "ai_chunk",
-                            "content": chunk,
-                            "user_id": user_id
-                        })
-                    )
-                
-                await manager.broadcast_to_room(
-                    room_id,
-                    json.dumps({
-                        "type": "ai_complete",
-                        "user_id": user_id,
-                        "full_response": full_response
-                    })
-                )
+                await _stream_team_reply(room_id, connection, user, prompt, mode, code_context)
                 
             else:
                 # Regular message - broadcast to room
                 await manager.broadcast_to_room(
                     room_id,
-                    json.dumps({
+                    {
                         "type": "message",
                         "user_id": user_id,
                         "username": user.username,
                         "content": message_data.get("content", ""),
                         "timestamp": datetime.utcnow().isoformat()
-                    }),
+                    },
                     exclude_user=user_id
                 )
     
     except WebSocketDisconnect:
-        manager.leave_room(room_id, user_id)
-        manager.disconnect(user_id)
-        
-        # Notify room that user left
-        await manager.broadcast_to_room(
-            room_id,
-            json.dumps({
-                "type": "user_left",
-                "user_id": user_id,
-                "username": user.username,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-        )
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.leave_room(room_id, user_id)
-        manager.disconnect(user_id)
+    finally:
+        await manager.disconnect(connection)
+        
+        # Notify room that user left
+        try:
+            await manager.broadcast_to_room(
+                room_id,
+                {
+                    "type": "user_left",
+                    "user_id": user_id,
+                    "username": user.username,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            )
+        except Exception as e:
+            print(f"WebSocket error: {e}")
+
+
+@router.get("/ws/stats", response_model=dict)
+async def get_connection_stats(current_user: UserInDB = Depends(get_current_user)):
+    """Get WebSocket connection and room counts for this worker"""
+    return success_response("Connection statistics retrieved", manager.stats())
@@ -0,0 +1,137 @@
+"""
+Production entry point: uvicorn with tuned settings, optional worker processes
+and a shutdown that lets AI streams finish
+
+Each worker is a separate process running its own lifespan, so it opens its
+own Mongo client and OpenAI connection pool. State that must be shared by
+all workers (team rooms, rate limits, new chats) has to be configured for it
+explicitly: with more than one worker, settings that would break a feature
+stop the server from starting, settings that only degrade one are warned
+about, and chat write-behind is switched off unless it was set explicitly.
+"""
+
+import asyncio
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from app.config import settings
+
+# Settings that keep state per process by default: the value several workers
+# need, what happens otherwise ("error", "warn", or "default" to switch it when
+# left unset), and what goes wrong
+WORKER_SETTINGS = {
+    "ROOM_BACKPLANE": ("mongo", "error", "team rooms only reach members connected to the same worker"),
+    "RATE_LIMIT_BACKEND": ("mongo", "error", "each worker enforces its own limit, multiplying every user's quota"),
+    "CHAT_WRITE_BEHIND_ENABLED": (
+        False, "default", "a new chat is not found by other workers until its batch is written"
+    ),
+    "SNIPPET_NGRAM_INDEX_ENABLED": (
+        False, "warn", "substring search misses other workers' writes for up to SNIPPET_NGRAM_INDEX_TTL_SECONDS"
+    ),
+}
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that waits for in-flight AI streams before shutting down
+
+    On the first SIGTERM/SIGINT the WebSocket manager stops accepting prompts
+    and up to SERVER_DRAIN_SECONDS are given to running streams; only then
+    does uvicorn close connections. A second SIGINT skips the wait.
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_timeout: float):
+        super().__init__(config)
+        self.drain_timeout = drain_timeout
+        self._drain: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def serve(self, sockets=None):
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets=sockets)
+
+    def handle_exit(self, sig, frame):
+        if self._loop is None or not self.started:
+            return super().handle_exit(sig, frame)
+        if self._drain is None:
+            self._drain = self._loop.create_task(self._drain_then_exit(sig, frame))
+        elif not self._drain.done():
+            # Ctrl+C again: stop waiting for streams
+            self._drain.cancel()
+            super().handle_exit(sig, frame)
+        else:
+            super().handle_exit(sig, frame)
+
+    async def _drain_then_exit(self, sig, frame):
+        from app.routes.websocket import manager
+
+        try:
+            await manager.drain(self.drain_timeout)
+        finally:
+            super().handle_exit(sig, frame)
+
+
+def check_worker_settings(workers: int) -> Tuple[List[str], List[str], Dict[str, str]]:
+    """Errors, warnings and defaults to switch for settings that don't fit running `workers` processes"""
+    errors, warnings, defaults = [], [], {}
+    if workers <= 1:
+        return errors, warnings, defaults
+    for name, (value, action, problem) in WORKER_SETTINGS.items():
+        current = getattr(settings, name)
+        if current == value:
+            continue
+        if action == "default" and name not in settings.model_fields_set:
+            defaults[name] = str(value).lower()
+            continue
+        message = f"{name}={str(current).lower()} with {workers} workers: {problem}; set {name}={str(value).lower()}"
+        (warnings if action == "warn" else errors).append(message)
+    return errors, warnings, defaults
+
+
+def build_config(workers: int) -> uvicorn.Config:
+    """uvicorn configuration from settings"""
+    return uvicorn.Config(
+        "app:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        ws="websockets",
+        ws_max_size=settings.WS_MAX_MESSAGE_BYTES,
+        ws_ping_interval=settings.WS_PING_INTERVAL_SECONDS,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT_SECONDS,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        backlog=settings.SERVER_BACKLOG,
+        proxy_headers=settings.PROXY_HEADERS,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )
+
+
+def serve():
+    """Run the API with WEB_CONCURRENCY worker processes"""
+    workers = max(1, settings.WEB_CONCURRENCY)
+    errors, warnings, defaults = check_worker_settings(workers)
+    for message in warnings:
+        print(f"⚠️  {message}")
+    if errors:
+        for message in errors:
+            print(f"❌ {message}")
+        sys.exit(1)
+    for name, value in defaults.items():
+        # Only settings the user left unset; worker processes re-read the environment
+        os.environ[name] = value
+        print(f"{name}={value} for {workers} workers")
+
+    config = build_config(workers)
+    server = DrainingServer(config, drain_timeout=settings.SERVER_DRAIN_SECONDS)
+    if workers > 1:
+        # Workers share one listening socket, as `uvicorn --workers` does
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
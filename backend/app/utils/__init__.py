@@ -1,10 +1,20 @@
-from .auth import verify_password, get_password_hash, create_access_token, decode_access_token
+from .auth import (
+    verify_password,
+    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    decode_access_token,
+)
 from .rate_limiter import rate_limiter
 from .openai_helper import generate_code, debug_code, explain_code, stream_ai_response
+from .response_cache import response_cache
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
     "create_access_token",
     "decode_access_token",
     "rate_limiter",
@@ -12,4 +22,5 @@ __all__ = [
     "debug_code",
     "explain_code",
     "stream_ai_response",
+    "response_cache",
 ]
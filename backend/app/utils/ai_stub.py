@@ -0,0 +1,93 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import httpx
+import openai
+
+STUB_CHUNK_CHARS = 16
+
+
+def _upstream_error(model: str, failure: str) -> Exception:
+    """Build the exception the real client raises for an injected failure"""
+    request = httpx.Request("POST", "https://stub.local/v1/chat/completions")
+    if failure == "timeout":
+        return openai.APITimeoutError(request=request)
+    if failure == "rate_limit":
+        response = httpx.Response(429, request=request)
+        return openai.RateLimitError(f"Stub rate limit for {model}", response=response, body=None)
+    response = httpx.Response(500, request=request)
+    return openai.InternalServerError(f"Stub error for {model}", response=response, body=None)
+
+
+class _StubStream:
+    """Async iterator of chunks shaped like the OpenAI streaming response"""
+
+    def __init__(self, text: str, delay: float):
+        self.text = text
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for i in range(0, len(self.text), STUB_CHUNK_CHARS):
+            if self.closed:
+                return
+            await asyncio.sleep(self.delay)
+            delta = SimpleNamespace(content=self.text[i:i + STUB_CHUNK_CHARS])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        self.closed = True
+
+
+class StubAIClient:
+    """Offline stand-in for AsyncOpenAI's chat completions API
+
+    Replies are deterministic (the model name and the last user message) after
+    a fixed latency, and `failures` maps a model name to "timeout",
+    "rate_limit" or "error" to exercise routing fallbacks without a network.
+    """
+
+    def __init__(self, latency: float = 0.0, failures: Optional[Dict[str, str]] = None):
+        self.latency = latency
+        self.failures = failures or {}
+        self.calls: Counter = Counter()  # requests per model; bounded however long it runs
+        # Mirror the client.chat.completions.create path
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _reply(self, model: str, messages: List[dict], max_tokens: Optional[int]) -> str:
+        prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        text = f"[{model}] {prompt}"
+        if max_tokens:
+            text = text[:max_tokens * 4]
+        return text
+
+    async def create(
+        self,
+        model: str,
+        messages: List[dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        **kwargs
+    ):
+        self.calls[model] += 1
+        failure = self.failures.get(model)
+        if failure:
+            await asyncio.sleep(self.latency)
+            raise _upstream_error(model, failure)
+
+        text = self._reply(model, messages, max_tokens)
+        if stream:
+            chunks = max(1, -(-len(text) // STUB_CHUNK_CHARS))
+            return _StubStream(text, self.latency / chunks)
+
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(role="assistant", content=text)
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(message=message)])
+
+    async def close(self):
+        pass
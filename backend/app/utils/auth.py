@@ -1,10 +1,20 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.utils.lru import LRUCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# Dedicated pool for bcrypt so hashing never blocks the event loop
+_password_executor: Optional[Executor] = None
+
+# Decoded payloads of recently seen tokens, so repeats skip signature verification
+token_cache = LRUCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -17,6 +27,39 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_password_executor() -> Executor:
+    global _password_executor
+    if _password_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _password_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+    return _password_executor
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the password worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the password worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), get_password_hash, password)
+
+
+def shutdown_password_executor():
+    """Shut down the password worker pool"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True)
+        _password_executor = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -32,8 +75,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode a JWT access token"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
         return None
+
+    # Never keep a payload cached past the token's own expiry
+    ttl = float(settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, payload, ttl)
+    return payload
@@ -0,0 +1,131 @@
+import asyncio
+from typing import List, Optional, Set, Tuple
+from app.config import settings
+from app.database.repositories import ChatRepository
+from app.database.schemas.chat import ChatHistoryInDB, ChatMessage
+from app.utils.openai_helper import summarize_conversation
+from app.utils.tokens import CHARS_PER_TOKEN, MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+CODE_CONTEXT_SHARE = 0.5  # most of the prompt budget the code context may take
+TRUNCATION_MARKER = "\n... [truncated]"
+
+SYSTEM_PROMPTS = {
+    "generate": """You are an expert programmer. Continue the conversation, generating clean,
+    well-commented code for the user's follow-up requests.""",
+    "debug": """You are an expert debugger. Continue the conversation, analyzing the code
+    and refining your fixes based on the user's follow-ups.""",
+    "explain": """You are a programming instructor. Continue the conversation, explaining the
+    code clearly and answering the user's follow-up questions.""",
+}
+
+# Keeps background summary tasks referenced until they finish
+_summary_tasks: Set[asyncio.Task] = set()
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly `max_tokens`"""
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + TRUNCATION_MARKER
+
+
+def _message_tokens(message: ChatMessage) -> int:
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _trimmed(chat: ChatHistoryInDB) -> int:
+    """Messages dropped from the front of the chat by CHAT_MAX_STORED_MESSAGES"""
+    # Chats older than message_total hold more messages than it counts: treat as untrimmed
+    return max(0, (chat.message_total or 0) - len(chat.messages))
+
+
+def _first_unsummarized(chat: ChatHistoryInDB) -> int:
+    """Position in `chat.messages` of the oldest message the summary doesn't cover
+
+    Summaries record how many messages ever added they cover, so the boundary
+    survives messages being trimmed from the front and ties between
+    timestamps. Chats summarized before that fall back to the timestamp.
+    """
+    if chat.summary_upto_index is not None:
+        return min(len(chat.messages), max(0, chat.summary_upto_index - _trimmed(chat)))
+    if chat.summary_upto is not None:
+        return next(
+            (i for i, m in enumerate(chat.messages) if m.timestamp > chat.summary_upto),
+            len(chat.messages)
+        )
+    return 0
+
+
+def _plan_conversation(
+    chat: ChatHistoryInDB,
+    prompt: str,
+    code_context: Optional[str],
+    budget: Optional[int],
+) -> Tuple[List[dict], int, int]:
+    """API messages for a turn, plus the bounds of the overflow the summary doesn't cover yet"""
+    budget = budget or settings.CHAT_CONTEXT_TOKEN_BUDGET
+    system_prompt = SYSTEM_PROMPTS.get(chat.mode, SYSTEM_PROMPTS["generate"])
+    head = [{"role": "system", "content": system_prompt}]
+
+    code_context = code_context or chat.code_context
+    if code_context:
+        code_context = _truncate(code_context, int(budget * CODE_CONTEXT_SHARE))
+        head.append({"role": "system", "content": f"Code under discussion:\n```\n{code_context}\n```"})
+    if chat.summary:
+        head.append({"role": "system", "content": f"Summary of the earlier conversation:\n{chat.summary}"})
+
+    used = sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in head)
+    used += estimate_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS
+
+    # Walk back from the newest turn until the budget runs out
+    start = len(chat.messages)
+    while start > 0:
+        cost = _message_tokens(chat.messages[start - 1])
+        if used + cost > budget:
+            break
+        used += cost
+        start -= 1
+
+    window = [{"role": m.role, "content": m.content} for m in chat.messages[start:]]
+    first = min(_first_unsummarized(chat), start)
+    return head + window + [{"role": "user", "content": prompt}], first, start
+
+
+def build_conversation(
+    chat: ChatHistoryInDB,
+    prompt: str,
+    code_context: Optional[str] = None,
+    budget: Optional[int] = None,
+) -> Tuple[List[dict], List[ChatMessage]]:
+    """Build the messages for a follow-up turn within the token budget
+
+    The prompt is the system prompt, the code context, the rolling summary,
+    as many of the most recent turns as fit, and the new user prompt.
+    Returns the API messages and the older turns that were left out and are
+    not yet covered by the summary.
+    """
+    messages, first, start = _plan_conversation(chat, prompt, code_context, budget)
+    return messages, chat.messages[first:start]
+
+
+async def refresh_summary(chat: ChatHistoryInDB):
+    """Fold turns that fell out of the prompt window into the rolling summary"""
+    _, first, start = _plan_conversation(chat, "", chat.code_context, None)
+    overflow = chat.messages[first:start]
+    if sum(_message_tokens(m) for m in overflow) < settings.CHAT_SUMMARY_TRIGGER_TOKENS:
+        return
+
+    turns = [{"role": m.role, "content": m.content} for m in overflow]
+    try:
+        summary = await summarize_conversation(chat.summary, turns)
+        await ChatRepository.update_chat_summary(chat.id, chat.user_id, summary, _trimmed(chat) + start)
+    except Exception as e:
+        print(f"Chat summary refresh failed: {e}")
+
+
+def schedule_summary_refresh(chat: ChatHistoryInDB):
+    """Refresh the chat summary in the background, off the response path"""
+    task = asyncio.create_task(refresh_summary(chat))
+    _summary_tasks.add(task)
+    task.add_done_callback(_summary_tasks.discard)
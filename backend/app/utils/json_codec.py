@@ -0,0 +1,50 @@
+from typing import Any, AsyncIterator, Tuple
+import orjson
+
+
+def dumps(obj: Any) -> str:
+    """Encode an object as compact JSON text"""
+    return orjson.dumps(obj).decode("utf-8")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode an object as compact JSON bytes"""
+    return orjson.dumps(obj)
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON text or bytes"""
+    return orjson.loads(data)
+
+
+class LineTooLongError(ValueError):
+    """Raised for an NDJSON line longer than the allowed size"""
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Any]]:
+    """Split a byte stream into (line number, line) pairs, skipping blank lines
+
+    An over-long line is yielded as a LineTooLongError instead of bytes and
+    the rest of it is discarded, so memory stays bounded by max_line_bytes.
+    """
+    buffer = b""
+    line_no = 0
+    skipping = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_no += 1
+            if skipping:
+                skipping = False  # tail of the over-long line
+            elif len(line) > max_line_bytes:
+                yield line_no, LineTooLongError(f"Line is longer than {max_line_bytes} bytes")
+            elif line.strip():
+                yield line_no, line
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield line_no + 1, LineTooLongError(f"Line is longer than {max_line_bytes} bytes")
+                skipping = True
+            buffer = b""
+    if buffer.strip() and not skipping:
+        yield line_no + 1, buffer
@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, refreshing its LRU position"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.max_entries <= 0:
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value from the cache"""
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        return entry[1]
+
+    def clear(self):
+        """Remove every entry"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def stats(self) -> dict:
+        """Get cache counters"""
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
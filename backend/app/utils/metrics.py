@@ -0,0 +1,251 @@
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Seconds; covers fast cache hits through slow long completions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram: observing is a bisect and two additions"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one value"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a JSON stats endpoint"""
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+# Tokens per second of generated output
+THROUGHPUT_BUCKETS = (1, 5, 10, 20, 40, 80, 160, 320)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class HistogramFamily:
+    """A histogram metric with one child histogram per label combination"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.children: Dict[Tuple[str, ...], Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        """Get the child histogram for a label combination, creating it on first use"""
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = Histogram(self.buckets)
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, histogram in list(self.children.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = 'le="' + _format_number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}")
+            labels = _label_text(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(histogram.sum)}")
+            lines.append(f"{self.name}_count{labels} {histogram.count}")
+        return lines
+
+
+class CallbackMetric:
+    """A gauge or counter read from a callback when metrics are collected
+
+    The callback returns a number, or a dict of label value tuples to numbers,
+    so the hot path never does any work for it.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, callback: Callable[[], Any], labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.callback()
+        if isinstance(value, dict):
+            for values, number in value.items():
+                if not isinstance(values, tuple):
+                    values = (values,)
+                lines.append(f"{self.name}{_label_text(self.labelnames, values)} {_format_number(number)}")
+        else:
+            lines.append(f"{self.name} {_format_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text format
+
+    Recording is plain attribute arithmetic on the event loop thread, so it
+    needs no locks.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> HistogramFamily:
+        """Register a histogram family"""
+        family = HistogramFamily(name, help, labelnames, buckets)
+        self.metrics[name] = family
+        return family
+
+    def gauge(self, name: str, help: str, callback: Callable[[], Any], labelnames: Sequence[str] = ()):
+        """Register a gauge read from `callback` at collection time"""
+        self.metrics[name] = CallbackMetric(name, help, "gauge", callback, labelnames)
+
+    def counter(self, name: str, help: str, callback: Callable[[], Any], labelnames: Sequence[str] = ()):
+        """Register a counter read from `callback` at collection time"""
+        self.metrics[name] = CallbackMetric(name, help, "counter", callback, labelnames)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry and the histograms recorded in hot paths
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP handler latency by route",
+    ("method", "route", "status")
+)
+mongo_operation_duration = registry.histogram(
+    "mongo_operation_duration_seconds",
+    "MongoDB operation latency by repository method",
+    ("operation",)
+)
+ai_time_to_first_token = registry.histogram(
+    "ai_time_to_first_token_seconds",
+    "Time from sending an AI request to its first streamed token",
+    ("mode", "tier")
+)
+ai_request_duration = registry.histogram(
+    "ai_request_duration_seconds",
+    "Total AI request duration",
+    ("mode", "tier")
+)
+ai_tokens_per_second = registry.histogram(
+    "ai_tokens_per_second",
+    "Generated tokens per second of AI request duration",
+    ("mode", "tier"),
+    buckets=THROUGHPUT_BUCKETS
+)
+
+
+def instrument_repository(cls):
+    """Class decorator recording the latency of every public async repository method"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if isinstance(attr, staticmethod) and inspect.iscoroutinefunction(attr.__func__):
+            setattr(cls, name, staticmethod(_timed(attr.__func__, mongo_operation_duration.labels(f"{cls.__name__}.{name}"))))
+    return cls
+
+
+def _timed(func: Callable, histogram: Histogram) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP handler latency by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route templates keep the label set small; unmatched paths share one label
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_duration.labels(scope["method"], path, str(status_code)).observe(
+                time.perf_counter() - started
+            )
@@ -0,0 +1,249 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import openai
+from app.config import settings
+from app.utils.metrics import ai_request_duration, ai_time_to_first_token, ai_tokens_per_second
+from app.utils.openai_client import ai_client, AIOverloadedError, AITimeoutError
+from app.utils.tokens import estimate_message_tokens, estimate_tokens
+
+# Upstream failures worth retrying on another tier
+FALLBACK_ERRORS = (openai.APITimeoutError, openai.RateLimitError, asyncio.TimeoutError)
+
+
+async def _close_upstream(stream):
+    """Close a streaming response so the upstream request stops generating"""
+    try:
+        if hasattr(stream, "close"):
+            await stream.close()
+        else:
+            await stream.response.aclose()
+    except Exception:
+        pass
+
+
+class PromptTooLargeError(Exception):
+    """Raised when a prompt doesn't fit the context window of any model tier"""
+
+
+class ModelTier:
+    """One routing table entry: a model, its context window and output budgets per mode"""
+
+    __slots__ = ("name", "model", "context_window", "max_tokens")
+
+    def __init__(self, name: str, model: str, context_window: int, max_tokens: Dict[str, int]):
+        self.name = name
+        self.model = model
+        self.context_window = context_window
+        self.max_tokens = max_tokens
+
+    def max_tokens_for(self, mode: str) -> int:
+        """Completion token budget for a mode"""
+        return self.max_tokens.get(mode, self.max_tokens["default"])
+
+    def fits(self, prompt_tokens: int, mode: str) -> bool:
+        """Check whether the prompt plus the completion budget fits the context window"""
+        return prompt_tokens + self.max_tokens_for(mode) <= self.context_window
+
+
+class ModelRouter:
+    """Pick a model tier from the prompt size and mode, falling back on timeouts and 429s
+
+    Tiers are ordered cheapest first. A request is routed to the first tier at
+    or above its mode's minimum tier that fits the prompt; if that tier times
+    out or is rate limited, the next fitting tier is tried.
+    """
+
+    def __init__(self, tiers: List[ModelTier], mode_min_tier: Dict[str, str]):
+        self.tiers = tiers
+        self.mode_min_tier = mode_min_tier
+        self.routed: Dict[str, int] = {}
+        self.fallbacks = 0
+        self.timeouts = 0
+        self.abandoned = 0
+        self.too_large = 0
+
+    def route(self, mode: str, messages: List[dict]) -> Tuple[int, List[ModelTier]]:
+        """Estimate prompt tokens and list the tiers to try, in order"""
+        prompt_tokens = estimate_message_tokens(messages)
+        names = [tier.name for tier in self.tiers]
+        start = names.index(self.mode_min_tier[mode]) if self.mode_min_tier.get(mode) in names else 0
+        candidates = [tier for tier in self.tiers[start:] if tier.fits(prompt_tokens, mode)]
+        if not candidates:
+            self.too_large += 1
+            raise PromptTooLargeError(
+                f"Prompt is too large ({prompt_tokens} tokens) for any available model"
+            )
+        return prompt_tokens, candidates
+
+    def _observe(self, tier: ModelTier, mode: str, started: float, tokens: int):
+        duration = time.perf_counter() - started
+        ai_request_duration.labels(mode, tier.name).observe(duration)
+        if duration > 0 and tokens:
+            ai_tokens_per_second.labels(mode, tier.name).observe(tokens / duration)
+        self.routed[tier.name] = self.routed.get(tier.name, 0) + 1
+
+    def _fallback(self, i: int, candidates: List[ModelTier], error: Exception, deadline: float):
+        """Count a failed attempt; raise if there is no tier or time left to fall back to"""
+        if isinstance(error, asyncio.TimeoutError):
+            self.timeouts += 1
+        if i < len(candidates) - 1 and asyncio.get_running_loop().time() < deadline:
+            self.fallbacks += 1
+            return
+        if isinstance(error, openai.RateLimitError):
+            raise AIOverloadedError("AI provider is rate limiting requests, please retry shortly") from error
+        raise AITimeoutError("AI response timed out") from error
+
+    async def complete(
+        self,
+        mode: str,
+        messages: List[dict],
+        temperature: float,
+        candidates: Optional[List[ModelTier]] = None,
+        on_answer: Optional[Callable[[ModelTier], None]] = None
+    ) -> str:
+        """Run a chat completion on the best tier, falling back if it is unavailable
+
+        Each attempt gets at most AI_ATTEMPT_TIMEOUT_SECONDS and all attempts
+        together at most AI_REQUEST_TIMEOUT_SECONDS. `on_answer` is called with
+        the tier that produced the reply.
+        """
+        if candidates is None:
+            _, candidates = self.route(mode, messages)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.AI_REQUEST_TIMEOUT_SECONDS
+        for i, tier in enumerate(candidates):
+            started = time.perf_counter()
+            timeout = min(settings.AI_ATTEMPT_TIMEOUT_SECONDS, deadline - loop.time())
+            try:
+                async with ai_client.slot(mode):
+                    response = await asyncio.wait_for(
+                        ai_client.client.chat.completions.create(
+                            model=tier.model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=tier.max_tokens_for(mode)
+                        ),
+                        timeout
+                    )
+            except FALLBACK_ERRORS as e:
+                self._fallback(i, candidates, e, deadline)
+                continue
+            content = response.choices[0].message.content
+            usage = getattr(response, "usage", None)
+            tokens = usage.completion_tokens if usage is not None else estimate_tokens(content)
+            self._observe(tier, mode, started, tokens)
+            if on_answer is not None:
+                on_answer(tier)
+            return content
+
+    async def stream(
+        self,
+        mode: str,
+        messages: List[dict],
+        temperature: float,
+        candidates: Optional[List[ModelTier]] = None,
+        on_answer: Optional[Callable[[ModelTier], None]] = None
+    ):
+        """Stream a chat completion; falls back only before the first chunk is sent
+
+        The first chunk must arrive within AI_FIRST_TOKEN_TIMEOUT_SECONDS and
+        the whole stream must finish within AI_STREAM_TIMEOUT_SECONDS. If the
+        consumer stops early (cancel, disconnect), the upstream response is
+        closed right away and its slot released. `on_answer` is called with
+        the tier that is streaming the reply.
+        """
+        if candidates is None:
+            _, candidates = self.route(mode, messages)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.AI_STREAM_TIMEOUT_SECONDS
+        for i, tier in enumerate(candidates):
+            started = time.perf_counter()
+            async with ai_client.slot(mode):
+                stream = None
+                try:
+                    first_token_deadline = min(deadline, loop.time() + settings.AI_FIRST_TOKEN_TIMEOUT_SECONDS)
+                    try:
+                        stream = await asyncio.wait_for(
+                            ai_client.client.chat.completions.create(
+                                model=tier.model,
+                                messages=messages,
+                                temperature=temperature,
+                                max_tokens=tier.max_tokens_for(mode),
+                                stream=True
+                            ),
+                            first_token_deadline - loop.time()
+                        )
+                        chunks = stream.__aiter__()
+                        chunk = await asyncio.wait_for(chunks.__anext__(), first_token_deadline - loop.time())
+                    except StopAsyncIteration:
+                        self._observe(tier, mode, started, 0)
+                        if on_answer is not None:
+                            on_answer(tier)
+                        return
+                    except FALLBACK_ERRORS as e:
+                        self._fallback(i, candidates, e, deadline)
+                        continue
+
+                    if on_answer is not None:
+                        on_answer(tier)
+
+                    ai_time_to_first_token.labels(mode, tier.name).observe(time.perf_counter() - started)
+                    # Each streamed content delta is about one token
+                    tokens = 0
+                    while True:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            tokens += 1
+                            yield chunk.choices[0].delta.content
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError as e:
+                            self.timeouts += 1
+                            raise AITimeoutError("AI response stream timed out") from e
+                except (asyncio.CancelledError, GeneratorExit):
+                    self.abandoned += 1
+                    raise
+                finally:
+                    if stream is not None:
+                        await _close_upstream(stream)
+            self._observe(tier, mode, started, tokens)
+            return
+
+    def stats(self) -> dict:
+        """Routing counts and latency per (tier, mode)"""
+        return {
+            "tiers": [
+                {"name": tier.name, "model": tier.model, "context_window": tier.context_window}
+                for tier in self.tiers
+            ],
+            "routed": dict(self.routed),
+            "fallbacks": self.fallbacks,
+            "timeouts": self.timeouts,
+            "abandoned_streams": self.abandoned,
+            "too_large": self.too_large,
+            "latency": {
+                f"{tier}:{mode}": histogram.snapshot()
+                for (mode, tier), histogram in ai_request_duration.children.items()
+            },
+        }
+
+
+def _load_tiers(table: List[dict]) -> List[ModelTier]:
+    return [
+        ModelTier(
+            name=entry["name"],
+            model=entry["model"],
+            context_window=entry["context_window"],
+            max_tokens=entry["max_tokens"]
+        )
+        for entry in table
+    ]
+
+
+# Global model router instance
+model_router = ModelRouter(
+    tiers=_load_tiers(settings.AI_MODEL_TIERS),
+    mode_min_tier=settings.AI_MODE_MIN_TIER,
+)
@@ -0,0 +1,78 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+GRAM_SIZE = 3
+MIN_SIMILARITY = 0.5  # fraction of the query's trigrams a fuzzy match must share
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace"""
+    return " ".join(text.lower().split())
+
+
+def ngrams(text: str, n: int = GRAM_SIZE) -> Set[str]:
+    """Set of character n-grams, padded so short words still produce grams"""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """In-memory trigram inverted index for substring and fuzzy matching
+
+    Holds one user's snippets: doc id -> searchable text, and trigram -> doc ids.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self.docs: Dict[str, Tuple[str, datetime]] = {}
+
+    def add(self, doc_id: str, text: str, created_at: datetime):
+        """Index (or re-index) a document"""
+        self.remove(doc_id)
+        normalized = normalize(text)
+        self.docs[doc_id] = (normalized, created_at)
+        for gram in ngrams(normalized):
+            self.postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index"""
+        entry = self.docs.pop(doc_id, None)
+        if entry is None:
+            return
+        for gram in ngrams(entry[0]):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def search(self, query: str, skip: int = 0, limit: int = 50) -> List[str]:
+        """Rank doc ids by trigram similarity; exact substrings rank first"""
+        needle = normalize(query)
+        if not needle:
+            return []
+
+        query_grams = ngrams(needle)
+        counts: Counter = Counter()
+        for gram in query_grams:
+            counts.update(self.postings.get(gram, ()))
+
+        scored = []
+        for doc_id, matched in counts.items():
+            similarity = matched / len(query_grams)
+            text, created_at = self.docs[doc_id]
+            exact = needle in text
+            if exact or similarity >= MIN_SIMILARITY:
+                scored.append((exact, similarity, created_at, doc_id))
+
+        scored.sort(reverse=True)
+        return [doc_id for _, _, _, doc_id in scored[skip:skip + limit]]
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+def searchable_text(title: str, description: str, tags: Iterable[str]) -> str:
+    """Text indexed for a snippet"""
+    return " ".join([title or "", description or "", " ".join(tags or [])])
@@ -0,0 +1,172 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Union
+import httpx
+from openai import AsyncOpenAI
+from app.config import settings
+from app.utils.ai_stub import StubAIClient
+
+
+class AIOverloadedError(Exception):
+    """Raised when the upstream AI request queue is full"""
+
+
+class AITimeoutError(Exception):
+    """Raised when an AI request misses its deadline"""
+
+
+class AIClientPool:
+    """Shared OpenAI client with bounded concurrency and request coalescing"""
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_concurrency: int,
+        mode_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        request_timeout: float,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_concurrency = max_concurrency
+        self.mode_concurrency = mode_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+
+        self._client: Optional[Union[AsyncOpenAI, StubAIClient]] = None
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._modes: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiting = 0
+        self._active = 0
+
+        self.requests = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def client(self) -> Union[AsyncOpenAI, StubAIClient]:
+        """Get the shared client, creating it on first use"""
+        if self._client is None:
+            self.start()
+        return self._client
+
+    def start(self):
+        """Create the shared client and its HTTP connection pool"""
+        if self._client is not None:
+            return
+        if settings.AI_BACKEND == "stub":
+            self._client = StubAIClient(
+                latency=settings.AI_STUB_LATENCY_MS / 1000,
+                failures=settings.AI_STUB_FAILURES
+            )
+            return
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(self.request_timeout, connect=10.0)
+        )
+        self._client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=http_client,
+            max_retries=settings.OPENAI_MAX_RETRIES
+        )
+
+    async def close(self):
+        """Close the shared client and its connections"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def _mode_semaphore(self, mode: str) -> asyncio.Semaphore:
+        if mode not in self._modes:
+            self._modes[mode] = asyncio.Semaphore(self.mode_concurrency)
+        return self._modes[mode]
+
+    async def _acquire(self, mode: str):
+        mode_semaphore = self._mode_semaphore(mode)
+        await mode_semaphore.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            mode_semaphore.release()
+            raise
+
+    @asynccontextmanager
+    async def slot(self, mode: str):
+        """Hold a global and per-mode upstream slot, shedding load when the queue is full"""
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise AIOverloadedError("AI service is busy, please retry shortly")
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._acquire(mode), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AIOverloadedError("Timed out waiting for an AI slot")
+        finally:
+            self._waiting -= 1
+
+        self.requests += 1
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._global.release()
+            self._mode_semaphore(mode).release()
+
+    async def coalesce(self, key: str, factory: Callable[[], Awaitable[str]]) -> str:
+        """Single-flight identical requests: concurrent callers share one upstream call"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        # Shield so one caller going away doesn't cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved when every waiter has gone
+
+    def stats(self) -> dict:
+        """Get pool and queue counters"""
+        return {
+            "max_connections": self.max_connections,
+            "max_concurrency": self.max_concurrency,
+            "mode_concurrency": self.mode_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "waiting": self._waiting,
+            "inflight_keys": len(self._inflight),
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+# Global AI client pool instance
+ai_client = AIClientPool(
+    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+    mode_concurrency=settings.OPENAI_MODE_CONCURRENCY,
+    max_queue=settings.OPENAI_MAX_QUEUE,
+    queue_timeout=settings.OPENAI_QUEUE_TIMEOUT_SECONDS,
+    request_timeout=settings.OPENAI_TIMEOUT_SECONDS,
+)
@@ -1,27 +1,59 @@
-from typing import Optional
-from openai import AsyncOpenAI
-from app.config import settings
+from contextlib import aclosing
+from typing import List, Optional
+from app.utils.model_router import ModelTier, model_router
+from app.utils.openai_client import ai_client
+from app.utils.response_cache import response_cache, make_cache_key
 
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+REPLAY_CHUNK_SIZE = 64  # characters per synthetic chunk when replaying a cache hit
+
+
+async def _cached_completion(
+    mode: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    language: Optional[str] = None,
+    code_context: Optional[str] = None,
+) -> str:
+    """Run a chat completion, serving repeated requests from the response cache"""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    _, candidates = model_router.route(mode, messages)
+
+    def cache_key(tier: ModelTier) -> str:
+        return make_cache_key(mode, language, system_prompt, user_prompt, code_context, tier.model, temperature)
+
+    key = cache_key(candidates[0])
+    cached = await response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def request() -> str:
+        answered = []
+        content = await model_router.complete(mode, messages, temperature, candidates, on_answer=answered.append)
+        # A fallback tier's reply is stored under that tier, not the one that was asked
+        await response_cache.set(cache_key(answered[0]), content)
+        return content
+
+    # Identical concurrent requests share a single upstream call
+    return await ai_client.coalesce(key, request)
+
+
+def _replay_chunks(text: str):
+    """Split a cached response into a synthetic chunk stream"""
+    for i in range(0, len(text), REPLAY_CHUNK_SIZE):
+        yield text[i:i + REPLAY_CHUNK_SIZE]
 
 
 async def generate_code(prompt: str, language: str = "python") -> str:
     """Generate code based on prompt"""
-    system_prompt = f"""You are an expert {language} programmer. Generate clean, well-commented, 
-    and production-ready code based on the user's request. Follow best practices and include 
+    system_prompt = f"""You are an expert {language} programmer. Generate clean, well-commented,
+    and production-ready code based on the user's request. Follow best practices and include
     appropriate error handling."""
-    
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        max_tokens=2000
-    )
-    
-    return response.choices[0].message.content
+
+    return await _cached_completion("generate", system_prompt, prompt, 0.7, language=language)
 
 
 async def debug_code(code: str, error_message: Optional[str] = None) -> str:
@@ -29,47 +61,27 @@ async def debug_code(code: str, error_message: Optional[str] = None) -> str:
     prompt = f"Debug the following code:\n\n```\n{code}\n```"
     if error_message:
         prompt += f"\n\nError message: {error_message}"
-    
-    system_prompt = """You are an expert debugger. Analyze the code, identify issues, 
+
+    system_prompt = """You are an expert debugger. Analyze the code, identify issues,
     and provide a corrected version with explanations of what was wrong and how you fixed it."""
-    
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.3,
-        max_tokens=2000
-    )
-    
-    return response.choices[0].message.content
+
+    return await _cached_completion("debug", system_prompt, prompt, 0.3, code_context=code)
 
 
 async def explain_code(code: str) -> str:
     """Explain what code does"""
     prompt = f"Explain the following code in detail:\n\n```\n{code}\n```"
-    
-    system_prompt = """You are an expert programming instructor. Explain the code clearly, 
+
+    system_prompt = """You are an expert programming instructor. Explain the code clearly,
     covering what it does, how it works, and any important concepts. Make it educational and easy to understand."""
-    
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.5,
-        max_tokens=2000
-    )
-    
-    return response.choices[0].message.content
+
+    return await _cached_completion("explain", system_prompt, prompt, 0.5, code_context=code)
 
 
 async def stream_ai_response(prompt: str, mode: str, code_context: Optional[str] = None):
     """Stream AI response token by token"""
     if mode == "generate":
-        system_prompt = """You are an expert programmer. Generate clean, well-commented code 
+        system_prompt = """You are an expert programmer. Generate clean, well-commented code
         based on the user's request."""
         user_prompt = prompt
     elif mode == "debug":
@@ -78,18 +90,55 @@ async def stream_ai_response(prompt: str, mode: str, code_context: Optional[str]
     else:  # explain
         system_prompt = """You are a programming instructor. Explain code clearly and educationally."""
         user_prompt = f"Explain this code:\n\n{code_context}\n\nFocus: {prompt}"
-    
-    stream = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=0.5,
-        max_tokens=2000,
-        stream=True
-    )
-    
-    async for chunk in stream:
-        if chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
+
+    temperature = 0.5
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    _, candidates = model_router.route(mode, messages)
+    key = make_cache_key(mode, None, system_prompt, user_prompt, code_context, candidates[0].model, temperature)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        for piece in _replay_chunks(cached):
+            yield piece
+        return
+
+    # Only fully completed streams are cached, under the tier that answered
+    parts = []
+    answered = []
+    async with aclosing(model_router.stream(mode, messages, temperature, candidates, on_answer=answered.append)) as pieces:
+        async for piece in pieces:
+            parts.append(piece)
+            yield piece
+
+    key = make_cache_key(mode, None, system_prompt, user_prompt, code_context, answered[0].model, temperature)
+    await response_cache.set(key, "".join(parts))
+
+
+async def chat_completion(mode: str, messages: List[dict], temperature: float = 0.5) -> str:
+    """Run a multi-turn chat completion (not cached: conversations rarely repeat)"""
+    return await model_router.complete(mode, messages, temperature)
+
+
+async def stream_chat_completion(mode: str, messages: List[dict], temperature: float = 0.5):
+    """Stream a multi-turn chat completion token by token"""
+    async with aclosing(model_router.stream(mode, messages, temperature)) as pieces:
+        async for piece in pieces:
+            yield piece
+
+
+async def summarize_conversation(summary: Optional[str], turns: List[dict]) -> str:
+    """Fold conversation turns into a running summary"""
+    transcript = "\n\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    prompt = f"Conversation:\n\n{transcript}"
+    if summary:
+        prompt = f"Summary so far:\n{summary}\n\n{prompt}"
+
+    system_prompt = """Summarize this programming conversation for later reference. Keep decisions,
+    requirements, code names and open questions; drop pleasantries. Reply with the summary only."""
+
+    return await model_router.complete("summary", [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ], 0.2)
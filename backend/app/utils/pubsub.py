@@ -0,0 +1,236 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+from pymongo import CursorType, IndexModel
+from pymongo.errors import CollectionInvalid
+from app.config import settings
+from app.database.connection import get_database
+from app.database.indexes import register_indexes
+
+# Called with (room_id, encoded message, excluded user_id) to deliver to local sockets
+DeliverFn = Callable[[str, str, Optional[str]], None]
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class RoomBackplane:
+    """Pub-sub interface for room membership and broadcasts across workers"""
+
+    async def start(self, deliver: DeliverFn):
+        """Start receiving broadcasts, handing each one to `deliver`"""
+        self.deliver = deliver
+
+    async def stop(self):
+        """Stop receiving broadcasts"""
+
+    async def publish(self, room_id: str, message: str, exclude_user: Optional[str] = None):
+        """Broadcast an encoded message to every member of a room, on every worker"""
+        raise NotImplementedError
+
+    async def join(self, room_id: str, user_id: str):
+        """Record that a user joined a room on this worker"""
+
+    async def leave(self, room_id: str, user_id: str):
+        """Record that a user left a room on this worker"""
+
+    async def members(self, room_id: str) -> Set[str]:
+        """Get the user ids in a room across all workers"""
+        raise NotImplementedError
+
+
+class InMemoryBackplane(RoomBackplane):
+    """Single-process backplane: broadcasts are delivered directly"""
+
+    def __init__(self):
+        self.rooms: Dict[str, Dict[str, int]] = {}
+
+    async def publish(self, room_id: str, message: str, exclude_user: Optional[str] = None):
+        self.deliver(room_id, message, exclude_user)
+
+    async def join(self, room_id: str, user_id: str):
+        room = self.rooms.setdefault(room_id, {})
+        room[user_id] = room.get(user_id, 0) + 1
+
+    async def leave(self, room_id: str, user_id: str):
+        room = self.rooms.get(room_id)
+        if room is None or user_id not in room:
+            return
+        room[user_id] -= 1
+        if room[user_id] <= 0:
+            del room[user_id]
+        if not room:
+            del self.rooms[room_id]
+
+    async def members(self, room_id: str) -> Set[str]:
+        return set(self.rooms.get(room_id, ()))
+
+
+class MongoBackplane(RoomBackplane):
+    """Multi-worker backplane over a capped collection and a tailable cursor
+
+    Every worker appends broadcasts to `room_events` and tails it, delivering
+    events from other workers to its local members. Membership is kept in
+    `room_members` with one document per (room, user, worker), refreshed by a
+    heartbeat and expired by a TTL index if a worker dies.
+    """
+
+    events_collection = "room_events"
+    members_collection = "room_members"
+
+    def __init__(self, capped_bytes: int, presence_ttl_seconds: int):
+        self.capped_bytes = capped_bytes
+        self.presence_ttl_seconds = presence_ttl_seconds
+        self.local_rooms: Dict[str, Dict[str, int]] = {}
+        self._tail_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: DeliverFn):
+        await super().start(deliver)
+        db = get_database()
+        try:
+            await db.create_collection(
+                MongoBackplane.events_collection,
+                capped=True,
+                size=self.capped_bytes
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        self._tail_task = asyncio.create_task(self._tail_forever())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_forever())
+
+    async def stop(self):
+        for task in (self._tail_task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._tail_task = None
+        self._heartbeat_task = None
+
+        # Drop this worker's presence right away instead of waiting for the TTL
+        try:
+            db = get_database()
+            await db[MongoBackplane.members_collection].delete_many({"worker_id": WORKER_ID})
+        except Exception:
+            pass
+
+    async def publish(self, room_id: str, message: str, exclude_user: Optional[str] = None):
+        # Local members get the message immediately; other workers pick it up by tailing
+        self.deliver(room_id, message, exclude_user)
+        db = get_database()
+        await db[MongoBackplane.events_collection].insert_one({
+            "room_id": room_id,
+            "message": message,
+            "exclude_user": exclude_user,
+            "origin": WORKER_ID,
+            "created_at": datetime.utcnow()
+        })
+
+    async def _tail_forever(self):
+        """Deliver other workers' events in insertion order, resuming after the last one seen
+
+        Event ids are generated by each worker's driver, so they don't sort in
+        insertion order across workers: the cursor is never filtered by _id.
+        A re-opened cursor replays the capped collection in natural order and
+        skips up to the last event seen. If that event was already overwritten,
+        everything still in the collection is newer and is delivered.
+        """
+        db = get_database()
+        collection = db[MongoBackplane.events_collection]
+        last = await collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else None
+
+        while True:
+            try:
+                skipping = (
+                    last_id is not None
+                    and await collection.find_one({"_id": last_id}, {"_id": 1}) is not None
+                )
+                cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                async for event in cursor:
+                    if skipping:
+                        skipping = event["_id"] != last_id
+                        continue
+                    last_id = event["_id"]
+                    if event.get("origin") != WORKER_ID:
+                        self.deliver(event["room_id"], event["message"], event.get("exclude_user"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Room backplane tail error: {e}")
+            # Tailable cursors die when the collection is empty or on errors
+            await asyncio.sleep(0.5)
+
+    def _presence_id(self, room_id: str, user_id: str) -> str:
+        return f"{room_id}:{user_id}:{WORKER_ID}"
+
+    async def _touch(self, room_id: str, user_id: str):
+        db = get_database()
+        await db[MongoBackplane.members_collection].update_one(
+            {"_id": self._presence_id(room_id, user_id)},
+            {"$set": {
+                "room_id": room_id,
+                "user_id": user_id,
+                "worker_id": WORKER_ID,
+                "expires_at": datetime.utcnow() + timedelta(seconds=self.presence_ttl_seconds)
+            }},
+            upsert=True
+        )
+
+    async def join(self, room_id: str, user_id: str):
+        room = self.local_rooms.setdefault(room_id, {})
+        room[user_id] = room.get(user_id, 0) + 1
+        await self._touch(room_id, user_id)
+
+    async def leave(self, room_id: str, user_id: str):
+        room = self.local_rooms.get(room_id)
+        if room is None or user_id not in room:
+            return
+        room[user_id] -= 1
+        if room[user_id] > 0:
+            return
+        del room[user_id]
+        if not room:
+            del self.local_rooms[room_id]
+        db = get_database()
+        await db[MongoBackplane.members_collection].delete_one({"_id": self._presence_id(room_id, user_id)})
+
+    async def members(self, room_id: str) -> Set[str]:
+        db = get_database()
+        cursor = db[MongoBackplane.members_collection].find({"room_id": room_id}, {"user_id": 1})
+        return {doc["user_id"] async for doc in cursor}
+
+    async def _heartbeat_forever(self):
+        interval = max(1, self.presence_ttl_seconds // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                for room_id, users in list(self.local_rooms.items()):
+                    for user_id in list(users):
+                        await self._touch(room_id, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Room backplane heartbeat error: {e}")
+
+
+register_indexes(MongoBackplane.members_collection, [
+    IndexModel("room_id"),
+    IndexModel("expires_at", expireAfterSeconds=0),
+])
+
+
+def create_backplane(name: str) -> RoomBackplane:
+    """Build the configured room backplane"""
+    if name == "mongo":
+        return MongoBackplane(
+            capped_bytes=settings.ROOM_EVENTS_CAPPED_BYTES,
+            presence_ttl_seconds=settings.ROOM_PRESENCE_TTL_SECONDS
+        )
+    return InMemoryBackplane()
+
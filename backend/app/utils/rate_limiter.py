@@ -1,53 +1,194 @@
+import asyncio
+import math
+import time
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional, Tuple
+from pymongo import IndexModel, ReturnDocument
 from app.config import settings
+from app.database.connection import get_collection
+from app.database.indexes import register_indexes
 
 
-class RateLimiter:
-    """Simple in-memory rate limiter using timestamps"""
-    
+class RateLimitBackend:
+    """Storage interface for sliding-window rate limit counters"""
+
+    async def hit(self, key: str, limit: int, window_seconds: int, now: float) -> Tuple[bool, float]:
+        """Record a request if under the limit; returns (allowed, estimated count)"""
+        raise NotImplementedError
+
+    async def count(self, key: str, window_seconds: int, now: float) -> float:
+        """Get the estimated number of requests in the current sliding window"""
+        raise NotImplementedError
+
+    async def sweep(self, window_seconds: int, now: float) -> int:
+        """Evict counters that no longer affect any limit; returns number evicted"""
+        return 0
+
+
+def _window_weight(window_seconds: int, now: float) -> float:
+    """Fraction of the previous fixed window still inside the sliding window"""
+    return 1.0 - (now % window_seconds) / window_seconds
+
+
+class _Window:
+    __slots__ = ("index", "current", "previous")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.current = 0
+        self.previous = 0
+
+    def roll(self, index: int):
+        if index != self.index:
+            self.previous = self.current if index == self.index + 1 else 0
+            self.current = 0
+            self.index = index
+
+
+class MemoryBackend(RateLimitBackend):
+    """Process-local sliding-window counter: two integers per active key"""
+
     def __init__(self):
-        self.requests: Dict[str, list] = {}
-    
-    def is_allowed(self, user_id: str) -> bool:
-        """Check if user is allowed to make a request"""
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=settings.RATE_LIMIT_WINDOW_MINUTES)
-        
-        # Get user's request history
-        if user_id not in self.requests:
-            self.requests[user_id] = []
-        
-        # Remove old requests outside the window
-        self.requests[user_id] = [
-            req_time for req_time in self.requests[user_id]
-            if req_time > window_start
-        ]
-        
-        # Check if user has exceeded the limit
-        if len(self.requests[user_id]) >= settings.RATE_LIMIT_REQUESTS:
-            return False
-        
-        # Add current request
-        self.requests[user_id].append(now)
-        return True
-    
-    def get_remaining_requests(self, user_id: str) -> int:
+        self.windows: Dict[str, _Window] = {}
+
+    async def hit(self, key: str, limit: int, window_seconds: int, now: float) -> Tuple[bool, float]:
+        index = int(now // window_seconds)
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = _Window(index)
+        else:
+            window.roll(index)
+
+        estimate = window.previous * _window_weight(window_seconds, now) + window.current
+        if estimate >= limit:
+            return False, estimate
+
+        window.current += 1
+        return True, estimate + 1
+
+    async def count(self, key: str, window_seconds: int, now: float) -> float:
+        window = self.windows.get(key)
+        if window is None:
+            return 0
+        window.roll(int(now // window_seconds))
+        return window.previous * _window_weight(window_seconds, now) + window.current
+
+    async def sweep(self, window_seconds: int, now: float) -> int:
+        # Keys last seen two or more windows ago contribute nothing to the estimate
+        stale_before = int(now // window_seconds) - 1
+        stale = [key for key, window in self.windows.items() if window.index < stale_before]
+        for key in stale:
+            del self.windows[key]
+        return len(stale)
+
+
+class MongoBackend(RateLimitBackend):
+    """Sliding-window counter shared by every worker through MongoDB"""
+
+    collection_name = "rate_limits"
+
+    async def _get_count(self, key: str, index: int) -> int:
+        collection = get_collection(MongoBackend.collection_name, "fast_write")
+        doc = await collection.find_one({"_id": f"{key}:{index}"}, {"count": 1})
+        return doc["count"] if doc else 0
+
+    async def hit(self, key: str, limit: int, window_seconds: int, now: float) -> Tuple[bool, float]:
+        collection = get_collection(MongoBackend.collection_name, "fast_write")
+        index = int(now // window_seconds)
+        previous = await self._get_count(key, index - 1)
+
+        # Increment first so concurrent workers can't both squeeze in under the limit
+        doc = await collection.find_one_and_update(
+            {"_id": f"{key}:{index}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "expires_at": datetime.utcnow() + timedelta(seconds=2 * window_seconds)
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        estimate = previous * _window_weight(window_seconds, now) + doc["count"]
+        if estimate - 1 >= limit:
+            await collection.update_one({"_id": f"{key}:{index}"}, {"$inc": {"count": -1}})
+            return False, estimate - 1
+        return True, estimate
+
+    async def count(self, key: str, window_seconds: int, now: float) -> float:
+        index = int(now // window_seconds)
+        previous = await self._get_count(key, index - 1)
+        current = await self._get_count(key, index)
+        return previous * _window_weight(window_seconds, now) + current
+
+
+register_indexes(MongoBackend.collection_name, [IndexModel("expires_at", expireAfterSeconds=0)])
+
+
+class RateLimiter:
+    """Per-user sliding-window rate limiter with a pluggable storage backend"""
+
+    def __init__(self, limit: int, window_seconds: int, backend: RateLimitBackend):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.backend = backend
+        self.rejected = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def is_allowed(self, user_id: str) -> bool:
+        """Check if user is allowed to make a request, recording it if so"""
+        allowed, _ = await self.backend.hit(user_id, self.limit, self.window_seconds, time.time())
+        if not allowed:
+            self.rejected += 1
+        return allowed
+
+    async def get_remaining_requests(self, user_id: str) -> int:
         """Get number of remaining requests for user"""
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=settings.RATE_LIMIT_WINDOW_MINUTES)
-        
-        if user_id not in self.requests:
-            return settings.RATE_LIMIT_REQUESTS
-        
-        # Count requests in current window
-        recent_requests = [
-            req_time for req_time in self.requests[user_id]
-            if req_time > window_start
-        ]
-        
-        return max(0, settings.RATE_LIMIT_REQUESTS - len(recent_requests))
+        used = await self.backend.count(user_id, self.window_seconds, time.time())
+        return max(0, self.limit - math.ceil(used))
+
+    async def get_status(self, user_id: str) -> dict:
+        """Get the full rate limit status for user"""
+        return {
+            "remaining_requests": await self.get_remaining_requests(user_id),
+            "total_requests": self.limit,
+            "window_minutes": self.window_seconds // 60
+        }
+
+    def start_sweeper(self, interval_seconds: float):
+        """Start the background task that evicts idle keys"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever(interval_seconds))
+
+    async def stop_sweeper(self):
+        """Stop the background sweeper"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_forever(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.backend.sweep(self.window_seconds, time.time())
+            except Exception as e:
+                print(f"Rate limiter sweep failed: {e}")
+
+
+def _create_backend(name: str) -> RateLimitBackend:
+    if name == "mongo":
+        return MongoBackend()
+    return MemoryBackend()
 
 
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(
+    limit=settings.RATE_LIMIT_REQUESTS,
+    window_seconds=settings.RATE_LIMIT_WINDOW_MINUTES * 60,
+    backend=_create_backend(settings.RATE_LIMIT_BACKEND),
+)
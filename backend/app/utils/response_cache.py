@@ -0,0 +1,145 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import IndexModel
+from app.config import settings
+from app.database.connection import get_collection
+from app.database.indexes import register_indexes
+from app.utils.lru import LRUCache
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    """Collapse whitespace so trivially different prompts share a key"""
+    if not text:
+        return ""
+    return " ".join(text.split())
+
+
+def _normalize_code(code: Optional[str]) -> str:
+    """Normalize line endings and trailing whitespace, keeping indentation"""
+    if not code:
+        return ""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def make_cache_key(
+    mode: str,
+    language: Optional[str],
+    system_prompt: str,
+    user_prompt: str,
+    code_context: Optional[str],
+    model: str,
+    temperature: float,
+) -> str:
+    """Build a stable hash for an AI request"""
+    normalized = json.dumps(
+        [
+            mode,
+            (language or "").lower(),
+            _normalize_text(system_prompt),
+            _normalize_text(user_prompt),
+            _normalize_code(code_context),
+            model,
+            round(float(temperature), 3),
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier AI response cache: in-process LRU plus optional shared Mongo tier"""
+
+    collection_name = "ai_response_cache"
+
+    def __init__(self, enabled: bool, max_entries: int, ttl_seconds: int, use_mongo: bool = False):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.use_mongo = use_mongo
+        self.local = LRUCache(max_entries, ttl_seconds)
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached response, checking the local tier first"""
+        if not self.enabled:
+            return None
+
+        value = self.local.get(key)
+        if value is not None or not self.use_mongo:
+            return value
+
+        try:
+            collection = get_collection(ResponseCache.collection_name, "fast_write")
+            doc = await collection.find_one({
+                "_id": key,
+                "expires_at": {"$gt": datetime.utcnow()}
+            })
+        except Exception:
+            self.shared_errors += 1
+            return None
+
+        if doc is None:
+            self.shared_misses += 1
+            return None
+
+        self.shared_hits += 1
+        self.local.set(key, doc["response"])
+        return doc["response"]
+
+    async def set(self, key: str, response: Optional[str]):
+        """Store a response in both tiers"""
+        if not self.enabled or not response:
+            return
+
+        self.local.set(key, response)
+        if not self.use_mongo:
+            return
+
+        try:
+            collection = get_collection(ResponseCache.collection_name, "fast_write")
+            await collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "response": response,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                },
+                upsert=True
+            )
+        except Exception:
+            self.shared_errors += 1
+
+    def clear(self):
+        """Clear the local tier"""
+        self.local.clear()
+
+    def stats(self) -> dict:
+        """Get hit/miss/eviction counters for both tiers"""
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "local": self.local.stats(),
+            "shared": {
+                "enabled": self.use_mongo,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "errors": self.shared_errors,
+            },
+        }
+
+
+register_indexes(ResponseCache.collection_name, [IndexModel("expires_at", expireAfterSeconds=0)])
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    enabled=settings.AI_CACHE_ENABLED,
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+    use_mongo=settings.AI_CACHE_MONGO_ENABLED,
+)
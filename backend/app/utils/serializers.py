@@ -0,0 +1,94 @@
+from typing import Any
+from fastapi.responses import ORJSONResponse
+from app.database.schemas.chat import ChatHistoryInDB
+from app.database.schemas.snippet import SnippetInDB
+from app.database.schemas.user import UserInDB
+
+# Encoders build plain dicts straight from Mongo documents or models. Datetimes
+# are left as-is: orjson writes them in the same ISO format as .isoformat().
+
+
+def success_response(message: str, data: Any, **extra: Any) -> ORJSONResponse:
+    """Standard success envelope, rendered straight to JSON bytes
+
+    Returning a Response from a route skips FastAPI's response validation
+    and jsonable_encoder pass.
+    """
+    content = {"status": "success", "message": message}
+    content.update(extra)
+    content["data"] = data
+    return ORJSONResponse(content)
+
+
+def snippet_document(doc: dict) -> dict:
+    """Encode a raw snippet document"""
+    return {
+        "id": str(doc["_id"]),
+        "title": doc["title"],
+        "code": doc["code"],
+        "language": doc["language"],
+        "description": doc.get("description"),
+        "tags": doc.get("tags", []),
+        "created_at": doc["created_at"],
+        "updated_at": doc["updated_at"]
+    }
+
+
+def snippet_model(snippet: SnippetInDB) -> dict:
+    """Encode a snippet model"""
+    return {
+        "id": str(snippet.id),
+        "title": snippet.title,
+        "code": snippet.code,
+        "language": snippet.language,
+        "description": snippet.description,
+        "tags": snippet.tags,
+        "created_at": snippet.created_at,
+        "updated_at": snippet.updated_at
+    }
+
+
+def chat_document(doc: dict) -> dict:
+    """Encode a raw chat history document"""
+    return {
+        "id": str(doc["_id"]),
+        "messages": [
+            {
+                "role": msg["role"],
+                "content": msg["content"],
+                "timestamp": msg["timestamp"]
+            }
+            for msg in doc.get("messages", [])
+        ],
+        "mode": doc["mode"],
+        "code_context": doc.get("code_context"),
+        "created_at": doc["created_at"]
+    }
+
+
+def chat_model(chat: ChatHistoryInDB) -> dict:
+    """Encode a chat history model"""
+    return {
+        "id": str(chat.id),
+        "messages": [
+            {
+                "role": msg.role,
+                "content": msg.content,
+                "timestamp": msg.timestamp
+            }
+            for msg in chat.messages
+        ],
+        "mode": chat.mode,
+        "code_context": chat.code_context,
+        "created_at": chat.created_at
+    }
+
+
+def user_model(user: UserInDB) -> dict:
+    """Encode the public fields of a user"""
+    return {
+        "id": str(user.id),
+        "username": user.username,
+        "email": user.email,
+        "created_at": user.created_at
+    }
@@ -0,0 +1,73 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+
+async def batch_stream(
+    source: AsyncIterator[str],
+    max_delay: float,
+    max_chars: int,
+) -> AsyncIterator[str]:
+    """Coalesce small text deltas into larger frames
+
+    The first delta is passed through immediately so time-to-first-token is
+    unchanged. After that, deltas are buffered and flushed once the oldest
+    buffered delta is `max_delay` seconds old or the buffer reaches
+    `max_chars` characters, whichever comes first.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = source.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    buffer: list = []
+    size = 0
+    deadline = 0.0
+    first = True
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                # Deadline reached while waiting for the next delta
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+                continue
+
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+
+            if first:
+                first = False
+                yield chunk
+                continue
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(chunk)
+            size += len(chunk)
+
+            if size >= max_chars:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        # Stop the source too, so an abandoned stream frees its upstream request
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending
+            except BaseException:
+                pass
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
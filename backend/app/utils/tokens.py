@@ -0,0 +1,40 @@
+from typing import Iterable, Optional
+
+try:
+    import tiktoken
+except ImportError:  # fall back to the character heuristic
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators per chat message
+ENCODING_NAME = "cl100k_base"  # used by the gpt-3.5 and gpt-4 families
+
+_encoding = None
+_encoding_failed = False
+
+
+def load_tokenizer() -> Optional[object]:
+    """Load the tokenizer once; None if tiktoken is missing or can't load its vocabulary"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding(ENCODING_NAME)
+        except Exception as e:
+            _encoding_failed = True
+            print(f"Tokenizer unavailable, estimating tokens from length: {e}")
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Count the tokens in a piece of text"""
+    if not text:
+        return 0
+    encoding = load_tokenizer()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_message_tokens(messages: Iterable[dict]) -> int:
+    """Count the prompt tokens of a list of chat messages"""
+    return sum(estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
@@ -0,0 +1,93 @@
+import asyncio
+import itertools
+from typing import Optional, Set
+from fastapi import WebSocket, status
+
+# What to do when a client's outbound queue is full
+SLOW_CONSUMER_POLICIES = ("disconnect", "drop_oldest", "drop_newest")
+
+_connection_ids = itertools.count(1)
+
+
+class ClientConnection:
+    """A WebSocket with a bounded outbound queue drained by its own writer task
+
+    Broadcasters only enqueue already-encoded text, so one slow socket can
+    never hold up delivery to anyone else.
+    """
+
+    __slots__ = (
+        "id", "websocket", "user_id", "rooms", "policy", "queue", "closed", "dropped", "_writer"
+    )
+
+    def __init__(self, websocket: WebSocket, user_id: str, max_queue: int, policy: str = "disconnect"):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.id = next(_connection_ids)
+        self.websocket = websocket
+        self.user_id = user_id
+        self.rooms: Set[str] = set()
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+        self.dropped = 0
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the writer task"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def send(self, message: str) -> bool:
+        """Queue an encoded message without waiting; returns False if it wasn't queued"""
+        if self.closed:
+            return False
+
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped += 1
+        if self.policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            return True
+        if self.policy == "disconnect":
+            self._close_slow_consumer()
+        return False
+
+    async def _write_loop(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await self.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket is gone; the receive loop will notice and clean up
+            self.closed = True
+
+    def _close_slow_consumer(self):
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+        asyncio.create_task(self._close_socket(status.WS_1013_TRY_AGAIN_LATER))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def close(self):
+        """Stop the writer task, discarding anything still queued"""
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._writer = None
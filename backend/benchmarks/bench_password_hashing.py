@@ -0,0 +1,108 @@
+"""
+Event-loop latency under concurrent login load
+
+Runs N concurrent bcrypt verifications the old way (inline in the event loop)
+and through the app's own offload path (`verify_password_async` and
+`get_password_hash_async` on the executor configured by
+PASSWORD_HASH_EXECUTOR and PASSWORD_HASH_WORKERS), while a probe task
+measures how late the event loop wakes it up. Only the bcrypt rounds are
+overridden. Run from the backend directory:
+
+    python -m benchmarks.bench_password_hashing --logins 50 --rounds 12
+    PASSWORD_HASH_EXECUTOR=process PASSWORD_HASH_WORKERS=8 python -m benchmarks.bench_password_hashing
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+PROBE_INTERVAL = 0.005  # seconds
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list):
+    """Record how much later than requested the loop resumes a sleeping task"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run_scenario(name: str, logins: int, verify) -> dict:
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    lags.sort()
+    return {
+        "scenario": name,
+        "logins": logins,
+        "total_seconds": round(elapsed, 3),
+        "loop_lag_p50_ms": round(statistics.median(lags) * 1000, 2),
+        "loop_lag_p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000, 2),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def main(logins: int):
+    from app.config import settings
+    from app.utils.auth import (
+        get_password_hash,
+        get_password_hash_async,
+        shutdown_password_executor,
+        verify_password,
+        verify_password_async,
+    )
+
+    rounds = settings.BCRYPT_ROUNDS
+    pool = f"{settings.PASSWORD_HASH_EXECUTOR}[{settings.PASSWORD_HASH_WORKERS}]"
+    password = "correct horse battery staple"
+    hashed = get_password_hash(password)
+
+    async def inline_verify():
+        verify_password(password, hashed)
+
+    async def offloaded_verify():
+        await verify_password_async(password, hashed)
+
+    async def offloaded_hash():
+        await get_password_hash_async(password)
+
+    try:
+        results = [
+            await run_scenario("inline", logins, inline_verify),
+            await run_scenario(f"verify {pool}", logins, offloaded_verify),
+            await run_scenario(f"hash {pool}", logins, offloaded_hash),
+        ]
+    finally:
+        shutdown_password_executor()
+
+    print(f"bcrypt rounds={rounds}, concurrent logins={logins}")
+    for result in results:
+        print(
+            f"  {result['scenario']:<20} total={result['total_seconds']:>7}s  "
+            f"lag p50={result['loop_lag_p50_ms']:>8}ms  "
+            f"p99={result['loop_lag_p99_ms']:>8}ms  max={result['loop_lag_max_ms']:>8}ms"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    # Settings are read when the app package is imported
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    asyncio.run(main(args.logins))
@@ -0,0 +1,105 @@
+"""
+Per-request CPU cost of serializing a 100-item snippet page
+
+Compares the previous route path (SnippetInDB per document, hand-built dicts
+with .isoformat(), jsonable_encoder, stdlib json) with the fast path (raw
+document encoders rendered by orjson). Run from the backend directory:
+
+    python -m benchmarks.bench_serialization --items 100 --code-size 2000
+"""
+
+import argparse
+import json
+import os
+import timeit
+from datetime import datetime, timedelta
+
+# Importing the app package loads settings; benchmarks don't need real secrets
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from app.database.schemas.snippet import SnippetInDB  # noqa: E402
+from app.utils.serializers import success_response, snippet_document  # noqa: E402
+
+
+def make_documents(items: int, code_size: int) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": "65a000000000000000000000",
+            "title": f"Snippet {i}",
+            "code": ("def handler(event):\n    return event\n" * (code_size // 36 + 1))[:code_size],
+            "language": "python",
+            "description": "Benchmark snippet",
+            "tags": ["bench", "python"],
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(items)
+    ]
+
+
+def legacy_page(docs: list) -> bytes:
+    snippets = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        snippets.append(SnippetInDB(**doc))
+    content = {
+        "status": "success",
+        "message": "Snippets retrieved successfully",
+        "data": [
+            {
+                "id": str(s.id),
+                "title": s.title,
+                "code": s.code,
+                "language": s.language,
+                "description": s.description,
+                "tags": s.tags,
+                "created_at": s.created_at.isoformat(),
+                "updated_at": s.updated_at.isoformat()
+            }
+            for s in snippets
+        ]
+    }
+    # What FastAPI + JSONResponse did for response_model=dict
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_page(docs: list) -> bytes:
+    response = success_response(
+        "Snippets retrieved successfully",
+        [snippet_document(doc) for doc in docs],
+        next_cursor=None
+    )
+    return response.body
+
+
+def main(items: int, code_size: int, repeat: int):
+    docs = make_documents(items, code_size)
+    assert json.loads(legacy_page(docs))["data"] == json.loads(fast_page(docs))["data"]
+
+    results = {}
+    for name, fn in (("legacy", legacy_page), ("fast_path", fast_page)):
+        runs = timeit.repeat(lambda: fn(docs), number=repeat, repeat=5)
+        results[name] = min(runs) / repeat * 1e6
+
+    print(f"{items} snippets x {code_size} chars of code, best of 5 x {repeat}")
+    for name, micros in results.items():
+        print(f"  {name:<10} {micros:>10.1f} us/request")
+    print(f"  speedup    {results['legacy'] / results['fast_path']:>10.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--code-size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.items, args.code_size, args.repeat)
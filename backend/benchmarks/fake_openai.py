@@ -0,0 +1,91 @@
+"""
+OpenAI-compatible chat completions server for offline load tests
+
+Serves POST /v1/chat/completions, both plain and streamed (server-sent
+events), replying with filler tokens after a fixed latency and at a fixed
+token rate. Point the API at it with OPENAI_BASE_URL. Run from the backend
+directory:
+
+    python -m benchmarks.fake_openai --port 9100 --latency-ms 300 --tokens-per-second 50
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+WORDS = ("def ", "return ", "value", " = ", "self", ".", "data", "(", ")", ":\n", "    ", "for ", "in ", "range")
+
+_ids = itertools.count(1)
+
+
+def create_app(latency: float, tokens_per_second: float, reply_tokens: int) -> Starlette:
+    """Build the stand-in app with the given timing"""
+    token_delay = 1 / tokens_per_second if tokens_per_second > 0 else 0
+
+    def reply(body: dict) -> list:
+        count = min(reply_tokens, body.get("max_tokens") or reply_tokens)
+        return [WORDS[i % len(WORDS)] for i in range(count)]
+
+    def envelope(model: str, kind: str) -> dict:
+        return {"id": f"chatcmpl-bench{next(_ids)}", "object": kind, "created": int(time.time()), "model": model}
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-3.5-turbo")
+        tokens = reply(body)
+
+        if body.get("stream"):
+            async def events():
+                await asyncio.sleep(latency)
+                for token in tokens:
+                    chunk = envelope(model, "chat.completion.chunk")
+                    chunk["choices"] = [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(token_delay)
+                chunk = envelope(model, "chat.completion.chunk")
+                chunk["choices"] = [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(latency + token_delay * len(tokens))
+        response = envelope(model, "chat.completion")
+        response["choices"] = [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": "stop"
+        }]
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        response["usage"] = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens)
+        }
+        return JSONResponse(response)
+
+    return Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300, help="delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--reply-tokens", type=int, default=200, help="tokens per reply (capped by max_tokens)")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms / 1000, args.tokens_per_second, args.reply_tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
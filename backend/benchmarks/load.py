@@ -0,0 +1,212 @@
+"""
+Load tests against the API running on local stand-ins
+
+Starts benchmarks.fake_openai and benchmarks.server as subprocesses, runs
+the chosen scenarios, samples the server's RSS, prints p50/p99 latency and
+throughput, and saves everything as JSON for comparing runs. Linux only
+(RSS is read from /proc). Run from the backend directory:
+
+    python -m benchmarks.load --scenario all --users 50
+    python -m benchmarks.load --scenario chat_streaming --users 200 --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+import httpx
+from benchmarks.scenarios import SCENARIOS, Context
+
+RSS_SAMPLE_INTERVAL = 0.2  # seconds
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MiB"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def sample_rss(pid: int, stop: asyncio.Event, samples: List[float]):
+    while not stop.is_set():
+        rss = read_rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+
+def start_process(module: str, *args: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", module, *args], cwd=os.getcwd())
+
+
+async def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, names: List[str], server: subprocess.Popen) -> List[dict]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_until_up(f"{base_url}/health")
+
+    params = {
+        "users": args.users,
+        "logins": args.logins,
+        "snippets": args.snippets,
+        "pages": args.pages,
+        "page_size": args.page_size,
+        "prompts": args.prompts,
+        "messages": args.messages,
+        "timeout": args.timeout,
+    }
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for name in names:
+            stop = asyncio.Event()
+            rss: List[float] = []
+            sampler = asyncio.create_task(sample_rss(server.pid, stop, rss))
+            started = time.perf_counter()
+            recorders = await SCENARIOS[name](Context(base_url, client, params))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await sampler
+
+            result = {
+                "scenario": name,
+                "elapsed_s": round(elapsed, 3),
+                "rss_peak_mb": round(max(rss), 1) if rss else None,
+                "rss_end_mb": round(rss[-1], 1) if rss else None,
+                "operations": [recorder.summary() for recorder in recorders],
+            }
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_result(result: dict):
+    print(f"\n{result['scenario']} ({result['elapsed_s']:.1f}s, peak RSS {result['rss_peak_mb']} MiB)")
+    print(f"  {'operation':<26}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for op in result["operations"]:
+        print(
+            f"  {op['operation']:<26}{op['count']:>8}{op['errors']:>8}"
+            f"{op['throughput_per_s']:>10.1f}{op['p50_ms']:>10.1f}{op['p99_ms']:>10.1f}"
+        )
+
+
+def compare(results: List[dict], baseline_path: str):
+    """Print the change against a previous run for every operation both have"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {
+        (result["scenario"], op["operation"]): op
+        for result in baseline["results"]
+        for op in result["operations"]
+    }
+
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nCompared with {baseline_path} ({baseline.get('git_commit')})")
+    print(f"  {'operation':<26}{'p50':>10}{'p99':>10}{'ops/s':>10}")
+    for result in results:
+        for op in result["operations"]:
+            old = previous.get((result["scenario"], op["operation"]))
+            if old is None:
+                continue
+            print(
+                f"  {op['operation']:<26}{change(op['p50_ms'], old['p50_ms']):>10}"
+                f"{change(op['p99_ms'], old['p99_ms']):>10}"
+                f"{change(op['throughput_per_s'], old['throughput_per_s']):>10}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="all", choices=["all", *SCENARIOS])
+    parser.add_argument("--users", type=int, default=50, help="concurrent users (room members for room_broadcast)")
+    parser.add_argument("--logins", type=int, default=2, help="login_storm: logins per user")
+    parser.add_argument("--snippets", type=int, default=10, help="snippet_crud: snippets per user")
+    parser.add_argument("--pages", type=int, default=50, help="deep_pagination: pages to walk")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--prompts", type=int, default=3, help="chat_streaming: prompts per user")
+    parser.add_argument("--messages", type=int, default=100, help="room_broadcast: messages to send")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--openai-port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300, help="stand-in OpenAI time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--reply-tokens", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--mongo-url", default=None, help="use a real MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--output", default="benchmarks/results", help="directory for the JSON results")
+    parser.add_argument("--compare", default=None, help="previous results file to compare against")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+
+    fake_openai = start_process(
+        "benchmarks.fake_openai",
+        "--port", str(args.openai_port),
+        "--latency-ms", str(args.latency_ms),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--reply-tokens", str(args.reply_tokens),
+    )
+    server_args = [
+        "--port", str(args.port),
+        "--openai-url", f"http://127.0.0.1:{args.openai_port}/v1",
+        "--bcrypt-rounds", str(args.bcrypt_rounds),
+    ]
+    if args.mongo_url:
+        server_args += ["--mongo-url", args.mongo_url]
+    server = start_process("benchmarks.server", *server_args)
+
+    try:
+        results = asyncio.run(run(args, names, server))
+    finally:
+        for process in (server, fake_openai):
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_commit": git_commit(),
+        "params": vars(args),
+        "results": results,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
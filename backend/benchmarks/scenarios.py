@@ -0,0 +1,258 @@
+"""
+Load test scenarios driven by benchmarks.load
+
+Each scenario takes a Context and returns a Recorder (or several, one per
+operation) holding per-operation latencies.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+import httpx
+import websockets
+
+PASSWORD = "benchmark-password"
+
+
+class Recorder:
+    """Latency samples and error count for one operation"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        ordered = sorted(self.latencies)
+
+        def quantile(q: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+        return {
+            "operation": self.name,
+            "count": len(ordered),
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(quantile(0.50), 2),
+            "p95_ms": round(quantile(0.95), 2),
+            "p99_ms": round(quantile(0.99), 2),
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        }
+
+
+class Context:
+    """Target URLs, shared HTTP client and scenario parameters"""
+
+    def __init__(self, base_url: str, client: httpx.AsyncClient, params: dict):
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://", 1)
+        self.client = client
+        self.params = params
+        self.run_id = uuid.uuid4().hex[:8]
+
+    async def register_users(self, count: int, prefix: str) -> List[dict]:
+        """Register users concurrently; returns [{"email", "token"}]"""
+        async def register(i: int) -> dict:
+            email = f"{prefix}-{self.run_id}-{i}@bench.io"
+            response = await self.client.post("/api/auth/register", json={
+                "username": f"{prefix}{i}", "email": email, "password": PASSWORD
+            })
+            response.raise_for_status()
+            return {"email": email, "token": response.json()["data"]["access_token"]}
+
+        return await asyncio.gather(*(register(i) for i in range(count)))
+
+
+async def timed(recorder: Recorder, request) -> Optional[httpx.Response]:
+    """Await an HTTP request, recording its latency (or an error)"""
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        recorder.errors += 1
+        return None
+    if response.status_code >= 400:
+        recorder.errors += 1
+        return response
+    recorder.record(time.perf_counter() - started)
+    return response
+
+
+def auth(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def login_storm(ctx: Context) -> List[Recorder]:
+    """Every user logs in `logins` times at once"""
+    users = await ctx.register_users(ctx.params["users"], "login")
+    recorder = Recorder("login")
+    await asyncio.gather(*(
+        timed(recorder, ctx.client.post("/api/auth/login", json={"email": user["email"], "password": PASSWORD}))
+        for user in users
+        for _ in range(ctx.params["logins"])
+    ))
+    recorder.finish()
+    return [recorder]
+
+
+async def snippet_crud(ctx: Context) -> List[Recorder]:
+    """Every user creates, reads, updates and deletes `snippets` snippets"""
+    users = await ctx.register_users(ctx.params["users"], "crud")
+    recorders = {name: Recorder(f"snippet_{name}") for name in ("create", "read", "update", "delete")}
+    code = "def handler(event):\n    return event\n" * 20
+
+    async def crud(user: dict):
+        headers = auth(user["token"])
+        for i in range(ctx.params["snippets"]):
+            response = await timed(recorders["create"], ctx.client.post("/api/snippets", headers=headers, json={
+                "title": f"Snippet {i}", "code": code, "tags": ["bench"]
+            }))
+            if response is None or response.status_code >= 400:
+                continue
+            snippet_id = response.json()["data"]["id"]
+            await timed(recorders["read"], ctx.client.get(f"/api/snippets/{snippet_id}", headers=headers))
+            await timed(recorders["update"], ctx.client.put(
+                f"/api/snippets/{snippet_id}", headers=headers, json={"title": f"Snippet {i} (edited)"}
+            ))
+            await timed(recorders["delete"], ctx.client.delete(f"/api/snippets/{snippet_id}", headers=headers))
+
+    await asyncio.gather(*(crud(user) for user in users))
+    for recorder in recorders.values():
+        recorder.finish()
+    return list(recorders.values())
+
+
+async def deep_pagination(ctx: Context) -> List[Recorder]:
+    """One user with `pages` pages of snippets walks them by cursor and by skip"""
+    user = (await ctx.register_users(1, "pages"))[0]
+    headers = auth(user["token"])
+    page_size = ctx.params["page_size"]
+    total = page_size * ctx.params["pages"]
+
+    semaphore = asyncio.Semaphore(32)
+
+    async def create(i: int):
+        async with semaphore:
+            await ctx.client.post("/api/snippets", headers=headers, json={"title": f"Page item {i}", "code": "x = 1"})
+
+    await asyncio.gather(*(create(i) for i in range(total)))
+
+    by_cursor = Recorder("page_by_cursor")
+    cursor = None
+    while True:
+        params = {"limit": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        response = await timed(by_cursor, ctx.client.get("/api/snippets", headers=headers, params=params))
+        if response is None or response.status_code >= 400:
+            break
+        cursor = response.json().get("next_cursor")
+        if not cursor:
+            break
+    by_cursor.finish()
+
+    by_skip = Recorder("page_by_skip")
+    for skip in range(0, total, page_size):
+        await timed(by_skip, ctx.client.get("/api/snippets", headers=headers, params={"skip": skip, "limit": page_size}))
+    by_skip.finish()
+    return [by_cursor, by_skip]
+
+
+async def chat_streaming(ctx: Context) -> List[Recorder]:
+    """N users stream AI replies over /ws/chat at once"""
+    users = await ctx.register_users(ctx.params["users"], "chat")
+    first_token = Recorder("chat_time_to_first_chunk")
+    complete = Recorder("chat_stream_complete")
+
+    async def chat(user: dict):
+        async with websockets.connect(f"{ctx.ws_url}/ws/chat?token={user['token']}", max_size=None) as ws:
+            for i in range(ctx.params["prompts"]):
+                started = time.perf_counter()
+                await ws.send(json.dumps({"prompt": f"Write function {i} for {user['email']}", "mode": "generate"}))
+                got_first = False
+                while True:
+                    message = json.loads(await ws.recv())
+                    kind = message.get("type") or message.get("t")
+                    if kind in ("chunk", "c") and not got_first:
+                        got_first = True
+                        first_token.record(time.perf_counter() - started)
+                    elif kind == "complete":
+                        complete.record(time.perf_counter() - started)
+                    elif kind == "chat_saved":
+                        break
+                    elif kind == "error":
+                        complete.errors += 1
+                        break
+
+    results = await asyncio.gather(*(chat(user) for user in users), return_exceptions=True)
+    complete.errors += sum(1 for result in results if isinstance(result, Exception))
+    first_token.finish()
+    complete.finish()
+    return [first_token, complete]
+
+
+async def room_broadcast(ctx: Context) -> List[Recorder]:
+    """One sender broadcasts `messages` messages to a room of N members"""
+    members = ctx.params["users"]
+    users = await ctx.register_users(members + 1, "room")
+    room = f"bench-{ctx.run_id}"
+    recorder = Recorder("room_delivery")
+    expected = members * ctx.params["messages"]
+    received = 0
+    done = asyncio.Event()
+
+    async def listen(user: dict, ready: asyncio.Event):
+        nonlocal received
+        async with websockets.connect(f"{ctx.ws_url}/ws/team/{room}?token={user['token']}", max_size=None) as ws:
+            ready.set()
+            while not done.is_set():
+                try:
+                    message = json.loads(await asyncio.wait_for(ws.recv(), timeout=1))
+                except asyncio.TimeoutError:
+                    continue
+                if message.get("type") != "message":
+                    continue
+                recorder.record(time.time() - float(message["content"]))
+                received += 1
+                if received >= expected:
+                    done.set()
+
+    readies = [asyncio.Event() for _ in range(members)]
+    listeners = [asyncio.create_task(listen(user, ready)) for user, ready in zip(users[1:], readies)]
+    await asyncio.gather(*(ready.wait() for ready in readies))
+
+    async with websockets.connect(f"{ctx.ws_url}/ws/team/{room}?token={users[0]['token']}", max_size=None) as sender:
+        for _ in range(ctx.params["messages"]):
+            await sender.send(json.dumps({"type": "message", "content": repr(time.time())}))
+        try:
+            await asyncio.wait_for(done.wait(), timeout=ctx.params["timeout"])
+        except asyncio.TimeoutError:
+            recorder.errors += expected - received
+        done.set()
+
+    await asyncio.gather(*listeners, return_exceptions=True)
+    recorder.finish()
+    return [recorder]
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "snippet_crud": snippet_crud,
+    "deep_pagination": deep_pagination,
+    "chat_streaming": chat_streaming,
+    "room_broadcast": room_broadcast,
+}
@@ -0,0 +1,50 @@
+"""
+Run the API against local stand-ins for load tests
+
+MongoDB is replaced by an in-memory mongomock-motor client (or a real
+server with --mongo-url) and OpenAI by the benchmarks.fake_openai server.
+Rate limits are lifted and the response cache is off by default so every
+request reaches the stand-ins. Run from the backend directory:
+
+    python -m benchmarks.server --port 8100 --openai-url http://127.0.0.1:9100/v1
+"""
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--openai-url", default="http://127.0.0.1:9100/v1")
+    parser.add_argument("--mongo-url", default=None, help="use a real MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--ai-cache", action="store_true", help="keep the AI response cache enabled")
+    args = parser.parse_args()
+
+    # Settings are read when the app package is imported
+    os.environ["OPENAI_BASE_URL"] = args.openai_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["RATE_LIMIT_REQUESTS"] = "1000000000"
+    os.environ["AI_CACHE_ENABLED"] = "true" if args.ai_cache else "false"
+    if args.mongo_url:
+        os.environ["MONGODB_URL"] = args.mongo_url
+
+    import uvicorn
+    import app.database.connection as connection
+    from app import app
+
+    if not args.mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+
+        # connect_to_mongo builds the client at startup, so swap the class it uses
+        connection.AsyncIOMotorClient = lambda url, **kwargs: AsyncMongoMockClient()
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,9 @@ Creates indexes and initial setup
 """
 
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.database import connection
+from app.database.indexes import INDEXES, ensure_indexes
 
 
 async def init_database():
@@ -13,27 +14,28 @@ async def init_database():
     print("🔧 Initializing CodeMentor AI Database...")
     
     # Connect to MongoDB
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
-    db = client[settings.DATABASE_NAME]
+    await connection.connect_to_mongo()
+    db = connection.get_database()
     
     print(f"📊 Database: {settings.DATABASE_NAME}")
     
-    # Create indexes for users collection
-    print("\n📝 Creating indexes for 'users' collection...")
-    await db.users.create_index("email", unique=True)
-    print("   ✅ Unique index on 'email'")
-    
-    # Create indexes for snippets collection
-    print("\n📝 Creating indexes for 'snippets' collection...")
-    await db.snippets.create_index([("user_id", 1), ("created_at", -1)])
-    await db.snippets.create_index("tags")
-    print("   ✅ Index on 'user_id' and 'created_at'")
-    print("   ✅ Index on 'tags'")
-    
-    # Create indexes for chat_history collection
-    print("\n📝 Creating indexes for 'chat_history' collection...")
-    await db.chat_history.create_index([("user_id", 1), ("created_at", -1)])
-    print("   ✅ Index on 'user_id' and 'created_at'")
+    # Create every index declared by the repositories and shared-state backends
+    print("\n📝 Reconciling indexes...")
+    report = await ensure_indexes()
+    for collection_name, models in INDEXES.items():
+        for model in models:
+            status = "created" if f"{collection_name}.{model.document['name']}" in report["created"] else "present"
+            print(f"   ✅ {collection_name}: {model.document['name']} ({status})")
+    for name in report["conflicts"]:
+        print(f"   ⚠️  {name} differs from its declaration (python -m app.database.diagnostics --rebuild)")
+    for error in report["errors"]:
+        print(f"   ❌ {error}")
+    
+    # Create the capped collection for the multi-worker room backplane
+    print("\n📝 Creating room backplane collections...")
+    if "room_events" not in await db.list_collection_names():
+        await db.create_collection("room_events", capped=True, size=settings.ROOM_EVENTS_CAPPED_BYTES)
+    print("   ✅ Capped collection 'room_events'")
     
     # List all collections
     print("\n📚 Collections in database:")
@@ -49,9 +51,10 @@ async def init_database():
     print("\n💡 Tips:")
     print("   - Collections will be created automatically when data is inserted")
     print("   - Indexes improve query performance")
-    print("   - Run this script again if you need to recreate indexes")
+    print("   - The API also creates missing indexes at startup (DB_ENSURE_INDEXES)")
+    print("   - python -m app.database.diagnostics checks query plans against them")
     
-    client.close()
+    await connection.close_mongo_connection()
 
 
 if __name__ == "__main__":
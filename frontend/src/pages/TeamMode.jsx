@@ -101,6 +101,18 @@ const TeamMode = () => {
         ]);
         setCurrentResponse('');
         setStreamingUser(null);
+      } else if (data.type === 'ai_error') {
+        setStreaming(false);
+        setMessages((prev) => [
+          ...prev,
+          {
+            type: 'system',
+            content: `AI response failed: ${data.message}`,
+            timestamp: new Date().toISOString(),
+          },
+        ]);
+        setCurrentResponse('');
+        setStreamingUser(null);
       }
     });
 